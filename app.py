@@ -1,25 +1,54 @@
+import time
 import streamlit as st
-import pandas as pd
-from etl.repository import get_data, get_payment_data, get_logistics_data, get_geojson_state
-from etl.utils import format_br, normalize_text
+from etl.summary import load_summary, data_ready, mark_ready, start_background_load, report_paint
 from ui.styles import CSS
-from ui.components import kpi_card
-from ui.charts import (
-    plot_financial_evolution, plot_payment_types, plot_top_states_revenue,
-    plot_delivery_status, plot_delay_distribution, plot_delay_rate_evolution,
-    plot_delay_ranking_by_state, plot_top_categories_revenue,
-    plot_top_categories_volume, plot_freight_weight_relationship,
-    plot_freight_efficiency
-)
-from ui.maps import plot_generic_choropleth
+from ui.components import kpi_card, format_br
+from ui.debug import profiling_requested, render_debug_panel
+from etl.profiler import start_rerun, finish_rerun, discard, current, span
+
+rerun_start = time.perf_counter()
+
+# Os loaders só registram o erro no log (também rodam em threads de segundo plano, sem sessão)
+def stop_without_data():
+    st.error("Não foi possível carregar os dados. Verifique a conexão com o banco (detalhes no log do servidor).")
+    st.stop()
+
+# Versão da carga (chave de todos os caches) e limites dos filtros, dos rollups: as linhas da
+# vw_analise_vendas só carregam nas abas que usam
+def load_filter_bounds():
+    from etl.repository import get_load_version, get_filter_bounds
+    version = get_load_version()
+    bounds = get_filter_bounds(version)
+
+    if bounds is None:
+        stop_without_data()
+
+    mark_ready()
+    return version, bounds
 
 st.set_page_config(page_title="Olist Analytics", layout="wide", page_icon="🇧🇷")
 st.markdown(CSS, unsafe_allow_html=True)
 
-df_raw = get_data()
+# Perfil opcional do rerun (OLIST_PROFILE=1 ou ?debug=1)
+profiling = profiling_requested()
+if profiling:
+    start_rerun()
+else:
+    discard()
 
-if df_raw.empty:
-    st.stop()
+# Cold start: enquanto o processo ainda não carregou os dados, cabeçalho, filtros e KPIs da visão
+# padrão saem do resumo pré-calculado (etl/summary.py), e pandas/plotly/dataset carregam em
+# segundo plano. Sem resumo (primeira execução), a página espera os dados como antes.
+resumo = None
+if not data_ready():
+    start_background_load()
+    resumo = load_summary()
+
+if resumo is None:
+    version, bounds = load_filter_bounds()
+    min_date, max_date, all_states = bounds['min_date'], bounds['max_date'], bounds['estados']
+else:
+    min_date, max_date, all_states = resumo['min_date'], resumo['max_date'], resumo['estados']
 
 st.title("📊 Olist E-Commerce Dashboard")
 
@@ -27,9 +56,6 @@ with st.expander("🎛️ Filtros de Análise", expanded=True):
     col_filtro1, col_filtro2 = st.columns(2)
     
     with col_filtro1:
-        min_date = df_raw['order_purchase_timestamp'].min()
-        max_date = df_raw['order_purchase_timestamp'].max()
-        
         date_range = st.date_input(
             "Período de Análise",
             value=(min_date, max_date),
@@ -38,46 +64,79 @@ with st.expander("🎛️ Filtros de Análise", expanded=True):
         )
         
     with col_filtro2:
-        all_states = sorted(df_raw['estado_cliente'].unique())
         selected_states = st.multiselect(
             "Filtrar Estados", 
             all_states
         )
 
-mask = (
-    (df_raw['order_purchase_timestamp'].dt.date >= date_range[0]) &
-    (df_raw['order_purchase_timestamp'].dt.date <= date_range[1])
-)
+KPI_TITLES = ["Receita Total", "Total Pedidos", "Ticket Médio", "Frete Médio"]
 
-if selected_states:
-    mask = mask & (df_raw['estado_cliente'].isin(selected_states))
+def show_kpis(slots, note, kpis):
+    values = [format_br(kpis['receita']), kpis['pedidos'], format_br(kpis['ticket']), format_br(kpis['frete_medio'])]
+    for slot, title, value in zip(slots, KPI_TITLES, values):
+        slot.markdown(kpi_card(title, value), unsafe_allow_html=True)
 
-df = df_raw.loc[mask]
+    # Pedidos estimados pelos sketches HyperLogLog (etl/sketch.py); 0 quando a contagem é exata
+    erro = kpis.get('erro_pedidos', 0)
+    if erro:
+        note.caption(f"Total Pedidos e Ticket Médio são estimativas (erro típico de ±{erro * 100:.1f}%)".replace(".", ","))
+    else:
+        note.empty()
 
 st.markdown("---")
 
-col1, col2, col3, col4 = st.columns(4)
+kpi_slots = [col.empty() for col in st.columns(4)]
+kpi_note = st.empty()
+
+# Os KPIs do resumo valem só para a visão padrão; com outro filtro os cards esperam os dados
+if resumo is not None:
+    if tuple(date_range) == (min_date, max_date) and not selected_states:
+        show_kpis(kpi_slots, kpi_note, resumo['kpis'])
+    else:
+        for slot, title in zip(kpi_slots, KPI_TITLES):
+            slot.markdown(kpi_card(title, "…"), unsafe_allow_html=True)
+    first_paint = time.perf_counter() - rerun_start
 
-with col1:
-    st.markdown(kpi_card("Receita Total", format_br(df['valor_venda'].sum())), unsafe_allow_html=True)
+# Imports pesados só depois da primeira pintura (no cold start a thread de carga já os trouxe
+# ou está trazendo; nos reruns seguintes saem do sys.modules)
+import pandas as pd
+from functools import partial
+from etl.repository import (
+    get_payment_data, get_logistics_data, get_geojson_state, get_geojson_states,
+    get_chart_tables, get_delay_histogram, get_category_orders, get_city_sales, get_geo_data
+)
+from ui.charts import (
+    plot_financial_evolution, plot_payment_types, plot_top_states_revenue,
+    plot_delivery_status, plot_delay_distribution, plot_delay_rate_evolution,
+    plot_delay_ranking_by_state, plot_top_categories_revenue,
+    plot_top_categories_volume, plot_freight_weight_relationship,
+    plot_freight_efficiency, plot_freight_by_distance
+)
+from ui.maps import plot_generic_choropleth, plot_customer_seller_density
 
-with col2:
-    st.markdown(kpi_card("Total Pedidos", df['order_id'].nunique()), unsafe_allow_html=True)
+if resumo is not None:
+    # Espera a mesma carga da thread em segundo plano (single-flight do cache)
+    version, bounds = load_filter_bounds()
 
-with col3:
-    ticket = df['valor_venda'].sum() / df['order_id'].nunique() if df['order_id'].nunique() > 0 else 0
-    st.markdown(kpi_card("Ticket Médio", format_br(ticket)), unsafe_allow_html=True)
+    # Resumo defasado (dados recarregados depois dele): redesenha os filtros com os limites reais
+    # antes da primeira interação, senão a troca de parâmetros dos widgets descartaria a seleção
+    if (bounds['min_date'], bounds['max_date'], list(bounds['estados'])) != (min_date, max_date, list(all_states)):
+        report_paint('resumo', first_paint, time.perf_counter() - rerun_start)
+        st.rerun()
 
-with col4:
-    st.markdown(kpi_card("Frete Médio", format_br(df['valor_frete'].mean())), unsafe_allow_html=True)
+# KPIs e tabelas dos gráficos calculados uma vez por filtro (rollups do pipeline ou pandas)
+tables = get_chart_tables(version, date_range, selected_states)
+show_kpis(kpi_slots, kpi_note, tables['kpis'])
+if resumo is None:
+    first_paint = time.perf_counter() - rerun_start
 
 st.markdown("---")
 
-tab1, tab2, tab3, tab4 = st.tabs(["💰 Visão Financeira", "⏱️ Performance de Prazos", "📦 Produtos", "🚚 Raio-X Logístico"])
-
-with tab1:
+# Cada seção é uma função executada só quando a aba está aberta: trocar um filtro ou widget
+# não recalcula consultas e figuras das outras abas. A aba escolhida fica na URL (?aba=...).
+def render_financeiro():
     st.subheader("Evolução Financeira: Faturamento vs. Custo de Frete")
-    st.plotly_chart(plot_financial_evolution(df), width="stretch")
+    st.plotly_chart(plot_financial_evolution(tables['mensal']), width="stretch")
 
     st.divider()
 
@@ -85,7 +144,7 @@ with tab1:
     
     with col_pay1:
         st.subheader("Meios de Pagamento")
-        df_pay = get_payment_data()
+        df_pay = get_payment_data(version)
         fig_pay = plot_payment_types(df_pay)
         if fig_pay:
             st.plotly_chart(fig_pay, width="stretch")
@@ -94,46 +153,56 @@ with tab1:
 
     with col_pay2:
         st.subheader("Top 10 Estados (Receita)")
-        st.plotly_chart(plot_top_states_revenue(df), width="stretch")
+        st.plotly_chart(plot_top_states_revenue(tables['estados']), width="stretch")
 
-with tab2:
+def render_prazos():
     col_log1, col_log2 = st.columns(2)
     with col_log1:
         st.subheader("Status de Entrega")
-        st.plotly_chart(plot_delivery_status(df), width="stretch")
+        st.plotly_chart(plot_delivery_status(tables['status']), width="stretch")
     
     with col_log2:
         st.subheader("Distribuição de Atrasos")
-        st.plotly_chart(plot_delay_distribution(df), width="stretch")
+        st.plotly_chart(plot_delay_distribution(get_delay_histogram(version, date_range, selected_states)), width="stretch")
         
     st.divider()
     
     col_prazo1, col_prazo2 = st.columns(2)
     with col_prazo1:
         st.subheader("Evolução da Taxa de Atraso (%)")
-        st.plotly_chart(plot_delay_rate_evolution(df), width="stretch")
+        st.plotly_chart(plot_delay_rate_evolution(tables['mensal']), width="stretch")
         
     with col_prazo2:
         st.subheader("Ranking de Atrasos por Estado")
-        fig_ranking = plot_delay_ranking_by_state(df)
+        fig_ranking = plot_delay_ranking_by_state(tables['estados'])
         if fig_ranking:
             st.plotly_chart(fig_ranking, width="stretch")
         else:
             st.info("Parabéns! Nenhum atraso registrado no período selecionado.")
 
-with tab3:
+def render_produtos():
     st.subheader("Análise de Portfólio de Produtos")
+    categorias, erro_pedidos = get_category_orders(version, date_range, selected_states)
     
     col_rank1, col_rank2 = st.columns(2)
     with col_rank1:
         st.markdown("**Top 10 Categorias por Faturamento**")
-        st.plotly_chart(plot_top_categories_revenue(df), width="stretch")
+        st.plotly_chart(plot_top_categories_revenue(categorias), width="stretch")
         
     with col_rank2:
         st.markdown("**Top 10 Categorias por Volume de Vendas**")
-        st.plotly_chart(plot_top_categories_volume(df), width="stretch")
+        st.plotly_chart(plot_top_categories_volume(categorias), width="stretch")
 
     st.divider()
+    render_category_map(version, date_range, selected_states, categorias, tables['categoria_estado'], erro_pedidos)
+
+# Fragmento: trocar a categoria reexecuta só o mapa, não a página inteira
+@st.fragment
+def render_category_map(version, date_range, selected_states, categorias, categoria_estado, erro_pedidos):
+    # Rerun só do fragmento: o perfil (se ligado) vai apenas para o OLIST_PROFILE_FILE
+    fragment_run = profiling and current() is None
+    if fragment_run:
+        start_rerun()
 
     is_single_state = len(selected_states) == 1
     
@@ -142,7 +211,7 @@ with tab3:
     else:
         st.subheader("🗺️ Mapa de Calor: Estados do Brasil")
 
-    top_categories = df.groupby('product_category_name')['valor_venda'].sum().sort_values(ascending=False).head(30).index.tolist()
+    top_categories = categorias.sort_values('valor_venda', ascending=False).head(30)['product_category_name'].tolist()
     
     if top_categories:
         cat_selecionada = st.selectbox(
@@ -150,34 +219,38 @@ with tab3:
             top_categories,
             format_func=lambda x: x.replace('_', ' ').title()
         )
+
+        # Pedidos com itens da categoria: estimados pelos sketches HyperLogLog (erro_pedidos > 0) ou exatos
+        categoria = categorias[categorias['product_category_name'] == cat_selecionada].iloc[0]
+        if categoria['qtd_pedidos'] > 0:
+            qtd_pedidos = f"{int(categoria['qtd_pedidos']):,}".replace(",", ".")
+            nota = f" (estimativa, erro típico de ±{erro_pedidos * 100:.1f}%)".replace(".", ",") if erro_pedidos else ""
+            st.caption(f"🧾 {qtd_pedidos} pedidos com a categoria{nota} · ticket médio na categoria {format_br(categoria['valor_venda'] / categoria['qtd_pedidos'])}")
         
-        df_cat_map = df[df['product_category_name'] == cat_selecionada]
+        sales_data = get_city_sales(version, date_range, selected_states, cat_selecionada)
 
-        if not df_cat_map.empty:
+        if not sales_data.empty:
             if is_single_state:
                 with st.spinner(f"Carregando mapa de {selected_states[0]}..."):
                     geojson_mun = get_geojson_state(selected_states[0])
                     
                     if geojson_mun:
-                        sales_data = df_cat_map.groupby('cidade_norm')['valor_venda'].sum().reset_index()
-                        
                         all_cities = pd.DataFrame({'cidade_norm': [f['properties']['id_norm'] for f in geojson_mun['features']]})
                         final_map_data = pd.merge(all_cities, sales_data, on='cidade_norm', how='left')
                         final_map_data['valor_venda'] = final_map_data['valor_venda'].fillna(0)
 
                         fig_map = plot_generic_choropleth(
-                            final_map_data, geojson_mun, 'cidade_norm', 'properties.id_norm', 'valor_venda',
+                            final_map_data, partial(get_geojson_state, selected_states[0]), 'cidade_norm', 'properties.id_norm', 'valor_venda',
                             f"Vendas em {selected_states[0]}", {'valor_venda': 'Faturamento (R$)', 'cidade_norm': 'Cidade'}
                         )
                         st.plotly_chart(fig_map, width="stretch")
                     else:
                         st.warning("Erro ao carregar GeoJSON.")
             else:
-                map_data = df_cat_map.groupby('estado_cliente')['valor_venda'].sum().reset_index()
-                geojson_br = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+                map_data = categoria_estado[categoria_estado['product_category_name'] == cat_selecionada]
                 
                 fig_map = plot_generic_choropleth(
-                    map_data, geojson_br, 'estado_cliente', 'properties.sigla', 'valor_venda',
+                    map_data, get_geojson_states, 'estado_cliente', 'properties.sigla', 'valor_venda',
                     f"Distribuição Nacional: {cat_selecionada}", {'valor_venda': 'Faturamento (R$)', 'estado_cliente': 'Estado'}
                 )
                 st.plotly_chart(fig_map, width="stretch")
@@ -186,26 +259,28 @@ with tab3:
     else:
         st.warning("Não há categorias disponíveis.")
 
-with tab4:
-    df_log = get_logistics_data()
+    if fragment_run:
+        finish_rerun()
+
+def render_logistica():
+    logistica = get_logistics_data(version)
     
-    if not df_log.empty:
+    if logistica:
         col_row1_a, col_row1_b = st.columns(2)
         
         with col_row1_a:
             st.subheader("Mapa de Calor do Frete")
-            frete_estado = df_log.groupby('customer_state')['freight_value'].mean().reset_index()
-            geojson_br = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+            frete_estado = logistica['estados']
             
             fig_map_frete = plot_generic_choropleth(
-                frete_estado, geojson_br, 'customer_state', 'properties.sigla', 'freight_value',
+                frete_estado, get_geojson_states, 'customer_state', 'properties.sigla', 'freight_value',
                 "Frete Médio por Estado", {'freight_value': 'Valor (R$)', 'customer_state': 'Estado'}
             )
             st.plotly_chart(fig_map_frete, width="stretch")
             
         with col_row1_b:
             st.subheader("Custo Médio por Faixa de Peso")
-            st.plotly_chart(plot_freight_weight_relationship(df_log), width="stretch")
+            st.plotly_chart(plot_freight_weight_relationship(logistica['faixas_peso']), width="stretch")
             
         st.divider()
         st.subheader("Eficiência do Frete: Onde ganhamos e onde perdemos?")
@@ -213,8 +288,53 @@ with tab4:
         col_bad, col_good = st.columns(2)
         with col_bad:
             st.markdown("⚠️ **Categorias com Frete Mais Caro**")
-            st.plotly_chart(plot_freight_efficiency(df_log, type='expensive'), width="stretch")
+            st.plotly_chart(plot_freight_efficiency(logistica['categorias'], type='expensive'), width="stretch")
             
         with col_good:
             st.markdown("✅ **Categorias com Frete Mais Barato**")
-            st.plotly_chart(plot_freight_efficiency(df_log, type='cheap'), width="stretch")
\ No newline at end of file
+            st.plotly_chart(plot_freight_efficiency(logistica['categorias'], type='cheap'), width="stretch")
+
+    # Seção do índice de CEP (geo_cep); sem o índice no banco ela não aparece
+    geo = get_geo_data(version)
+
+    if geo:
+        st.divider()
+        col_geo_a, col_geo_b = st.columns(2)
+
+        with col_geo_a:
+            st.subheader("Densidade de Clientes e Vendedores")
+            fig_densidade = plot_customer_seller_density(geo['densidade'])
+            if fig_densidade:
+                st.plotly_chart(fig_densidade, width="stretch")
+            else:
+                st.info("Sem clientes ou vendedores com CEP localizado.")
+
+        with col_geo_b:
+            st.subheader("Frete e Prazo por Distância")
+            fig_distancia = plot_freight_by_distance(geo['distancias'])
+            if fig_distancia:
+                st.plotly_chart(fig_distancia, width="stretch")
+            else:
+                st.info("Sem distâncias calculadas para os itens entregues.")
+
+SECTIONS = {
+    "💰 Visão Financeira": render_financeiro,
+    "⏱️ Performance de Prazos": render_prazos,
+    "📦 Produtos": render_produtos,
+    "🚚 Raio-X Logístico": render_logistica
+}
+
+tabs = st.tabs(list(SECTIONS), key="aba", on_change="rerun", bind="query-params")
+
+for tab, render in zip(tabs, SECTIONS.values()):
+    if tab.open:
+        with tab, span('secao', render.__name__):
+            render()
+
+paint = report_paint('resumo' if resumo is not None else 'dados', first_paint, time.perf_counter() - rerun_start)
+trace = current()
+if trace is not None:
+    trace['pintura'] = paint
+
+if profiling:
+    render_debug_panel(finish_rerun())
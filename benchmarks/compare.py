@@ -0,0 +1,32 @@
+import sys
+import json
+import pandas as pd
+
+# Compara dois arquivos de resultados (ex.: antes/depois de uma mudança)
+def compare(before, after):
+    rows = []
+    for name in sorted(set(before['resultados']) | set(after['resultados'])):
+        a = before['resultados'].get(name, {})
+        b = after['resultados'].get(name, {})
+        rows.append({
+            'caso': name,
+            'antes_ms': a.get('tempo_mediana_s', float('nan')) * 1000,
+            'depois_ms': b.get('tempo_mediana_s', float('nan')) * 1000,
+            'antes_mb': a.get('pico_memoria_mb', float('nan')),
+            'depois_mb': b.get('pico_memoria_mb', float('nan'))
+        })
+    report = pd.DataFrame(rows).set_index('caso')
+    report['tempo_x'] = report['antes_ms'] / report['depois_ms']
+    report['memoria_x'] = report['antes_mb'] / report['depois_mb']
+    return report
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python -m benchmarks.compare antes.json depois.json")
+        sys.exit(1)
+    with open(sys.argv[1], encoding='utf-8') as f:
+        before = json.load(f)
+    with open(sys.argv[2], encoding='utf-8') as f:
+        after = json.load(f)
+    pd.set_option('display.width', 160)
+    print(compare(before, after).round(2).to_string())
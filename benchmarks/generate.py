@@ -0,0 +1,272 @@
+import os
+import sys
+import math
+import argparse
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'database', 'pipelines')
+
+sys.path.insert(0, PIPELINE_DIR)
+from schemas import get_schema
+from upload_olist import FILES_MAP
+
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+VIEW_FILE = 'vw_analise_vendas.csv'
+
+# Volumes do dataset público (escala 1x)
+BASE_ORDERS = 99_441
+BASE_PRODUCTS = 32_951
+BASE_SELLERS = 3_095
+BASE_GEOLOCATION = 1_000_163
+CHUNK_ORDERS = 200_000
+
+# Participação aproximada de cada UF nos clientes da Olist (SP concentra ~42%)
+STATE_WEIGHTS = {
+    'SP': 42.0, 'RJ': 12.9, 'MG': 11.7, 'RS': 5.5, 'PR': 5.1, 'SC': 3.7, 'BA': 3.4, 'DF': 2.2,
+    'ES': 2.0, 'GO': 2.0, 'PE': 1.7, 'CE': 1.3, 'PA': 1.0, 'MT': 0.9, 'MA': 0.7, 'MS': 0.7,
+    'PB': 0.5, 'PI': 0.5, 'RN': 0.5, 'AL': 0.4, 'SE': 0.3, 'TO': 0.3, 'RO': 0.25, 'AM': 0.15,
+    'AC': 0.08, 'AP': 0.07, 'RR': 0.05
+}
+CAPITALS = {
+    'SP': 'são paulo', 'RJ': 'rio de janeiro', 'MG': 'belo horizonte', 'RS': 'porto alegre',
+    'PR': 'curitiba', 'SC': 'florianópolis', 'BA': 'salvador', 'DF': 'brasília', 'ES': 'vitória',
+    'GO': 'goiânia', 'PE': 'recife', 'CE': 'fortaleza', 'PA': 'belém', 'MT': 'cuiabá',
+    'MA': 'são luís', 'MS': 'campo grande', 'PB': 'joão pessoa', 'PI': 'teresina', 'RN': 'natal',
+    'AL': 'maceió', 'SE': 'aracaju', 'TO': 'palmas', 'RO': 'porto velho', 'AM': 'manaus',
+    'AC': 'rio branco', 'AP': 'macapá', 'RR': 'boa vista'
+}
+CITIES_PER_STATE = 60
+
+# Categorias mais vendidas, com pesos decrescentes (cauda longa)
+CATEGORIES = [
+    'cama_mesa_banho', 'beleza_saude', 'esporte_lazer', 'moveis_decoracao', 'informatica_acessorios',
+    'utilidades_domesticas', 'relogios_presentes', 'telefonia', 'ferramentas_jardim', 'automotivo',
+    'brinquedos', 'cool_stuff', 'perfumaria', 'bebes', 'eletronicos', 'papelaria',
+    'fashion_bolsas_e_acessorios', 'pet_shop', 'moveis_escritorio', 'consoles_games',
+    'malas_acessorios', 'construcao_ferramentas_construcao', 'eletrodomesticos',
+    'instrumentos_musicais', 'eletroportateis', 'casa_construcao', 'livros_interesse_geral',
+    'alimentos', 'moveis_sala', 'casa_conforto'
+]
+CATEGORY_NULL_SHARE = 0.0185
+
+ORDER_STATUS = {
+    'delivered': 0.970, 'shipped': 0.011, 'canceled': 0.006, 'unavailable': 0.006,
+    'invoiced': 0.003, 'processing': 0.003, 'created': 0.001
+}
+PAYMENT_TYPES = {'credit_card': 0.74, 'boleto': 0.19, 'voucher': 0.055, 'debit_card': 0.015}
+REVIEW_MESSAGES = [None, None, None, 'recomendo', 'chegou antes do prazo, "ótimo"', 'produto com defeito\nvou devolver']
+
+START_DATE = pd.Timestamp('2016-09-04')
+END_DATE = pd.Timestamp('2018-10-17')
+BLACK_FRIDAY = pd.Timestamp('2017-11-24')
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def _probabilities(weights):
+    values = np.asarray(list(weights), dtype=float)
+    return values / values.sum()
+
+def _zipf(n, exponent=1.1):
+    return _probabilities(1 / np.arange(1, n + 1) ** exponent)
+
+def _day_weights():
+    # Volume cresce ao longo de 2017, estabiliza em 2018 e tem pico na Black Friday
+    days = pd.date_range(START_DATE, END_DATE, freq='D')
+    growth = np.clip((days - START_DATE).days.to_numpy() / 450, 0.02, 1.0)
+    growth[days == BLACK_FRIDAY] *= 8
+    return days, growth / growth.sum()
+
+def _cities():
+    cities = {}
+    for uf, capital in CAPITALS.items():
+        cities[uf] = [capital] + [f"municipio {uf.lower()} {i:03d}" for i in range(1, CITIES_PER_STATE)]
+    return cities
+
+def _fmt(values):
+    return pd.Series(values).dt.strftime(DATE_FORMAT)
+
+def _write(df, table_name, path, append):
+    columns = list(get_schema(table_name)['columns'])
+    df[columns].to_csv(path, index=False, header=not append, mode='a' if append else 'w')
+
+def generate_dimensions(rng, scale):
+    n_products = max(100, int(BASE_PRODUCTS * math.sqrt(scale)))
+    n_sellers = max(50, int(BASE_SELLERS * math.sqrt(scale)))
+
+    category = rng.choice(np.array(CATEGORIES, dtype=object), n_products, p=_zipf(len(CATEGORIES)))
+    category[rng.random(n_products) < CATEGORY_NULL_SHARE] = None
+    weight = np.clip(rng.lognormal(6.5, 1.2, n_products), 50, 40_000).round()
+    products = pd.DataFrame({
+        'product_id': [f"{i:032x}" for i in rng.permutation(n_products)],
+        'product_category_name': category,
+        'product_name_lenght': rng.integers(5, 76, n_products).astype(float),
+        'product_description_lenght': rng.integers(4, 3_992, n_products).astype(float),
+        'product_photos_qty': rng.integers(1, 7, n_products).astype(float),
+        'product_weight_g': weight,
+        'product_length_cm': rng.integers(7, 105, n_products).astype(float),
+        'product_height_cm': rng.integers(2, 105, n_products).astype(float),
+        'product_width_cm': rng.integers(6, 118, n_products).astype(float)
+    })
+
+    states = np.array(list(STATE_WEIGHTS))
+    cities = _cities()
+    seller_state = rng.choice(states, n_sellers, p=_probabilities(STATE_WEIGHTS.values()))
+    sellers = pd.DataFrame({
+        'seller_id': [f"{i:032x}" for i in rng.permutation(n_sellers) + 10 ** 9],
+        'seller_zip_code_prefix': rng.integers(1_000, 99_990, n_sellers),
+        'seller_city': [cities[uf][0] for uf in seller_state],
+        'seller_state': seller_state
+    })
+    return products, sellers
+
+def generate_orders(rng, offset, n, products, sellers):
+    states = np.array(list(STATE_WEIGHTS))
+    cities = _cities()
+    city_p = _zipf(CITIES_PER_STATE, 1.3)
+
+    state = rng.choice(states, n, p=_probabilities(STATE_WEIGHTS.values()))
+    city = np.array([cities[uf][i] for uf, i in zip(state, rng.choice(CITIES_PER_STATE, n, p=city_p))], dtype=object)
+    customers = pd.DataFrame({
+        'customer_id': [f"c{offset + i:031x}" for i in range(n)],
+        'customer_unique_id': [f"u{i:031x}" for i in rng.integers(0, offset + n, n)],
+        'customer_zip_code_prefix': rng.integers(1_000, 99_990, n),
+        'customer_city': city,
+        'customer_state': state
+    })
+
+    days, day_p = _day_weights()
+    purchase = days.values[rng.choice(len(days), n, p=day_p)] + pd.to_timedelta(rng.integers(0, 86_400, n), unit='s').values
+    purchase = pd.DatetimeIndex(purchase)
+    status = rng.choice(np.array(list(ORDER_STATUS)), n, p=_probabilities(ORDER_STATUS.values()))
+    delivered = status == 'delivered'
+
+    estimated = (purchase + pd.to_timedelta(rng.integers(20, 40, n), unit='D')).normalize()
+    # ~8% dos pedidos chegam depois da data estimada
+    delivery = purchase + pd.to_timedelta(rng.gamma(2.2, 5.5, n) * 86_400, unit='s')
+    late = rng.random(n) < 0.08
+    delivery = delivery.where(~late, estimated + pd.to_timedelta(rng.gamma(1.5, 6, n) * 86_400, unit='s'))
+
+    orders = pd.DataFrame({
+        'order_id': [f"o{offset + i:031x}" for i in range(n)],
+        'customer_id': customers['customer_id'],
+        'order_status': status,
+        'order_purchase_timestamp': _fmt(purchase),
+        'order_approved_at': _fmt(purchase + pd.Timedelta(minutes=20)),
+        'order_delivered_carrier_date': _fmt((purchase + pd.Timedelta(days=2)).where(delivered)),
+        'order_delivered_customer_date': _fmt(delivery.where(delivered)),
+        'order_estimated_delivery_date': _fmt(estimated)
+    })
+
+    # 90% dos pedidos com 1 item
+    n_items = rng.choice([1, 2, 3, 4], n, p=[0.90, 0.075, 0.017, 0.008])
+    order_idx = np.repeat(np.arange(n), n_items)
+    product_idx = rng.choice(len(products), len(order_idx), p=_zipf(len(products), 0.9))
+    weight = products['product_weight_g'].to_numpy()[product_idx]
+    items = pd.DataFrame({
+        'order_id': orders['order_id'].to_numpy()[order_idx],
+        'order_item_id': np.concatenate([np.arange(1, k + 1) for k in n_items]),
+        'product_id': products['product_id'].to_numpy()[product_idx],
+        'seller_id': sellers['seller_id'].to_numpy()[rng.choice(len(sellers), len(order_idx), p=_zipf(len(sellers), 0.8))],
+        'shipping_limit_date': _fmt(purchase[order_idx] + pd.Timedelta(days=6)),
+        'price': np.clip(rng.lognormal(4.3, 0.9, len(order_idx)), 0.85, 6_735).round(2),
+        'freight_value': (8 + weight / 1000 * 2.5 * rng.uniform(0.6, 1.4, len(order_idx))).round(2)
+    })
+
+    payments = pd.DataFrame({
+        'order_id': orders['order_id'],
+        'payment_sequential': 1,
+        'payment_type': rng.choice(np.array(list(PAYMENT_TYPES)), n, p=_probabilities(PAYMENT_TYPES.values())),
+        'payment_installments': rng.integers(1, 11, n),
+        'payment_value': items.groupby(order_idx)['price'].sum().to_numpy() + items.groupby(order_idx)['freight_value'].sum().to_numpy()
+    })
+
+    created = (purchase + pd.to_timedelta(rng.integers(8, 40, n), unit='D')).normalize()
+    reviews = pd.DataFrame({
+        'review_id': [f"r{offset + i:031x}" for i in range(n)],
+        'order_id': orders['order_id'],
+        'review_score': rng.choice([1, 2, 3, 4, 5], n, p=[0.115, 0.032, 0.082, 0.193, 0.578]),
+        'review_comment_title': None,
+        'review_comment_message': rng.choice(np.array(REVIEW_MESSAGES, dtype=object), n),
+        'review_creation_date': _fmt(created),
+        'review_answer_timestamp': _fmt(created + pd.to_timedelta(rng.integers(3_600, 5 * 86_400, n), unit='s'))
+    })
+    return {'customers': customers, 'orders': orders, 'order_items': items, 'payments': payments, 'reviews': reviews}
+
+def generate_geolocation(rng, n):
+    states = np.array(list(STATE_WEIGHTS))
+    cities = _cities()
+    state = rng.choice(states, n, p=_probabilities(STATE_WEIGHTS.values()))
+    return pd.DataFrame({
+        'geolocation_zip_code_prefix': rng.integers(1_000, 99_990, n),
+        'geolocation_lat': rng.uniform(-33.7, 5.2, n),
+        'geolocation_lng': rng.uniform(-73.9, -34.8, n),
+        'geolocation_city': [cities[uf][0] for uf in state],
+        'geolocation_state': state
+    })
+
+# Mesmas linhas e colunas do VIEW_SQL de database/pipelines/ddl.py (itens de pedidos entregues)
+def build_sales_view(tables, products):
+    orders = tables['orders']
+    orders = orders[orders['order_status'] == 'delivered']
+    view = (
+        orders.merge(tables['order_items'], on='order_id')
+        .merge(tables['customers'], on='customer_id')
+        .merge(products[['product_id', 'product_category_name']], on='product_id', how='left')
+    )
+    # EXTRACT(DAY FROM intervalo)::integer trunca em direção a zero (o .dt.days arredonda para baixo)
+    delay = pd.to_datetime(view['order_delivered_customer_date']) - pd.to_datetime(view['order_estimated_delivery_date'])
+    return pd.DataFrame({
+        'order_id': view['order_id'],
+        'order_item_id': view['order_item_id'],
+        'order_purchase_timestamp': view['order_purchase_timestamp'],
+        'order_delivered_customer_date': view['order_delivered_customer_date'],
+        'cidade_cliente': view['customer_city'],
+        'estado_cliente': view['customer_state'],
+        'product_category_name': view['product_category_name'],
+        'valor_venda': view['price'],
+        'valor_frete': view['freight_value'],
+        'dias_atraso': np.trunc(delay / pd.Timedelta(days=1)).astype('Int64')
+    })
+
+def dataset_dir(scale):
+    return os.path.join(DATA_DIR, f"x{scale:g}")
+
+def generate(scale=1, out_dir=None, seed=42):
+    out_dir = out_dir or dataset_dir(scale)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {table: os.path.join(out_dir, csv_file) for csv_file, table in FILES_MAP.items()}
+
+    rng = np.random.default_rng(seed)
+    products, sellers = generate_dimensions(rng, scale)
+    _write(products, 'products', paths['products'], append=False)
+    _write(sellers, 'sellers', paths['sellers'], append=False)
+    _write(generate_geolocation(rng, BASE_GEOLOCATION), 'geolocation', paths['geolocation'], append=False)
+    translation = pd.DataFrame({'product_category_name': CATEGORIES, 'product_category_name_english': CATEGORIES})
+    _write(translation, 'category_translation', paths['category_translation'], append=False)
+
+    # Tabelas transacionais em blocos: a memória não cresce com a escala
+    total = int(BASE_ORDERS * scale)
+    for chunk, offset in enumerate(range(0, total, CHUNK_ORDERS)):
+        chunk_rng = np.random.default_rng([seed, chunk])
+        tables = generate_orders(chunk_rng, offset, min(CHUNK_ORDERS, total - offset), products, sellers)
+        for table, df in tables.items():
+            _write(df, table, paths[table], append=offset > 0)
+        build_sales_view(tables, products).to_csv(
+            os.path.join(out_dir, VIEW_FILE), index=False, header=offset == 0, mode='a' if offset else 'w'
+        )
+        print(f"  {min(offset + CHUNK_ORDERS, total):,}/{total:,} pedidos")
+
+    print(f"✅ Dataset {scale:g}x gerado em {out_dir}")
+    return out_dir
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos no formato da Olist")
+    parser.add_argument('--scale', type=float, nargs='+', default=[1], help="Escalas em relação ao dataset público (ex.: 1 10 100)")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    for scale in args.scale:
+        generate(scale, seed=args.seed)
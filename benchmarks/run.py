@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+import resource
+from datetime import date, datetime
+import pandas as pd
+
+from .generate import generate, dataset_dir, BENCH_DIR, PIPELINE_DIR, VIEW_FILE, STATE_WEIGHTS
+from etl.repository import prepare_sales_data, WEIGHT_BINS, WEIGHT_LABELS
+from etl.memory import optimize_dataframe
+from etl.filters import FilterEngine
+from etl.aggregations import (
+    build_sales_rollup, build_orders_rollup, compute_kpis, build_chart_tables, histogram_bins
+)
+from etl.geostore import load_states, load_municipalities
+from ui import charts
+from ui.maps import plot_generic_choropleth
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Filtro típico do dashboard: um semestre, dois estados
+QUERY = ((date(2018, 1, 1), date(2018, 6, 30)), ['SP', 'RJ'])
+
+def measure(fn, repeat):
+    # Uma execução com tracemalloc para o pico de memória, as demais só cronometradas
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        'tempo_mediana_s': statistics.median(times),
+        'tempo_min_s': min(times),
+        'pico_memoria_mb': peak / 2 ** 20,
+        'repeticoes': repeat
+    }
+
+# Filtro original do app.py (máscara booleana sobre o DataFrame inteiro), mantido como referência
+def mask_filter(df, date_range, states):
+    mask = (
+        (df['order_purchase_timestamp'].dt.date >= date_range[0]) &
+        (df['order_purchase_timestamp'].dt.date <= date_range[1])
+    )
+    if states:
+        mask = mask & (df['estado_cliente'].isin(states))
+    return df.loc[mask]
+
+# Mesmas agregações das queries de get_logistics_data / get_payment_data, em pandas sobre os CSVs
+def logistics_tables(data_dir):
+    read = lambda name, cols: pd.read_csv(os.path.join(data_dir, name), usecols=cols)
+    items = read('olist_order_items_dataset.csv', ['order_id', 'product_id', 'price', 'freight_value'])
+    orders = read('olist_orders_dataset.csv', ['order_id', 'customer_id', 'order_status'])
+    customers = read('olist_customers_dataset.csv', ['customer_id', 'customer_state'])
+    products = read('olist_products_dataset.csv', ['product_id', 'product_category_name', 'product_weight_g'])
+
+    log = (
+        items.merge(orders[orders['order_status'] == 'delivered'], on='order_id')
+        .merge(customers, on='customer_id')
+        .merge(products, on='product_id')
+    )
+    log['frete_relativo'] = log['freight_value'] / log['price'] * 100
+    log['faixa_peso'] = pd.cut(log['product_weight_g'], bins=WEIGHT_BINS, labels=WEIGHT_LABELS)
+
+    agg = {'freight_value': ('freight_value', 'mean'), 'qtd_itens': ('price', 'count')}
+    payments = read('olist_order_payments_dataset.csv', ['order_id', 'payment_type'])
+    return {
+        'estados': log.groupby('customer_state').agg(**agg).reset_index(),
+        'faixas_peso': log.groupby('faixa_peso', observed=True).agg(**agg).reset_index(),
+        'categorias': log.groupby('product_category_name').agg(frete_relativo=('frete_relativo', 'mean'), **agg).reset_index(),
+        'pagamentos': payments.groupby('payment_type')['order_id'].count().rename('qtd_pedidos').reset_index()
+    }
+
+# Um quadrado por UF quando o store de malhas não foi importado
+def grid_geojson(ufs):
+    features = []
+    for i, uf in enumerate(ufs):
+        x, y = -74 + (i % 7) * 5, -33 + (i // 7) * 5
+        ring = [[x, y], [x + 5, y], [x + 5, y + 5], [x, y + 5], [x, y]]
+        features.append({'type': 'Feature', 'properties': {'sigla': uf}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}})
+    return {'type': 'FeatureCollection', 'features': features}
+
+# Snapshot DuckDB mínimo (só a view) montado a partir do mesmo DataFrame do caminho pandas
+def duck_backend(engine, data_dir):
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    from etl.duck import DuckBackend
+
+    path = os.path.join(data_dir, 'bench.duckdb')
+    if os.path.exists(path):
+        os.remove(path)
+    con = duckdb.connect(path)
+    view = engine.df.assign(cidade_norm=engine.df['cidade_norm'].astype(str))
+    con.execute("CREATE TABLE vw_analise_vendas AS SELECT * FROM view")
+    con.execute("CREATE TABLE snapshot_info AS SELECT 'bench' AS versao")
+    con.close()
+    return DuckBackend(path)
+
+def dashboard_cases(data_dir):
+    raw = pd.read_csv(os.path.join(data_dir, VIEW_FILE))
+    df = optimize_dataframe(prepare_sales_data(raw.copy()))
+    engine = FilterEngine(df)
+    date_range, states = QUERY
+
+    filtered = engine.filter(date_range, states)
+    vendas = build_sales_rollup(filtered)
+    pedidos = build_orders_rollup(filtered)
+    tables = build_chart_tables(vendas)
+    bins = histogram_bins(filtered['dias_atraso'])
+    logistica = logistics_tables(data_dir)
+
+    geo_estados = load_states() or grid_geojson(list(STATE_WEIGHTS))
+    mapa_estados = tables['estados'][['estado_cliente', 'valor_venda']]
+
+    cases = {
+        'get_data.pos_processamento': lambda: optimize_dataframe(prepare_sales_data(raw.copy())),
+        'filtro.mascara_original': lambda: mask_filter(df, date_range, states),
+        'filtro.indice_construcao': lambda: FilterEngine(df),
+        'filtro.indice': lambda: engine.filter(date_range, states),
+        'agregacao.rollup_vendas': lambda: build_sales_rollup(filtered),
+        'agregacao.rollup_pedidos': lambda: build_orders_rollup(filtered),
+        'agregacao.kpis': lambda: compute_kpis(vendas, pedidos['qtd_pedidos'].sum()),
+        'agregacao.tabelas_graficos': lambda: build_chart_tables(vendas),
+        'agregacao.histograma': lambda: histogram_bins(filtered['dias_atraso']),
+        'graficos.plot_financial_evolution': lambda: charts.plot_financial_evolution(tables['mensal']),
+        'graficos.plot_payment_types': lambda: charts.plot_payment_types(logistica['pagamentos']),
+        'graficos.plot_top_states_revenue': lambda: charts.plot_top_states_revenue(tables['estados']),
+        'graficos.plot_delivery_status': lambda: charts.plot_delivery_status(tables['status']),
+        'graficos.plot_delay_distribution': lambda: charts.plot_delay_distribution(bins),
+        'graficos.plot_delay_rate_evolution': lambda: charts.plot_delay_rate_evolution(tables['mensal']),
+        'graficos.plot_delay_ranking_by_state': lambda: charts.plot_delay_ranking_by_state(tables['estados']),
+        'graficos.plot_top_categories_revenue': lambda: charts.plot_top_categories_revenue(tables['categorias']),
+        'graficos.plot_top_categories_volume': lambda: charts.plot_top_categories_volume(tables['categorias']),
+        'graficos.plot_freight_weight_relationship': lambda: charts.plot_freight_weight_relationship(logistica['faixas_peso']),
+        'graficos.plot_freight_efficiency': lambda: charts.plot_freight_efficiency(logistica['categorias']),
+        'mapas.estados': lambda: plot_generic_choropleth(
+            mapa_estados, geo_estados, 'estado_cliente', 'properties.sigla', 'valor_venda', 'Estados', {}
+        ).to_json()
+    }
+
+    duck = duck_backend(engine, data_dir)
+    if duck:
+        cases['filtro.duckdb'] = lambda: duck.filter(date_range, states)
+        cases['agregacao.rollup_vendas_duckdb'] = lambda: duck.sales_rollup(date_range, states)
+        cases['agregacao.rollup_pedidos_duckdb'] = lambda: duck.orders_rollup(date_range, states)
+
+    geo_sp = load_municipalities('SP')
+    if geo_sp:
+        cidades = filtered.groupby('cidade_norm', observed=True)['valor_venda'].sum().reset_index()
+        cases['mapas.municipios_sp'] = lambda: plot_generic_choropleth(
+            cidades, geo_sp, 'cidade_norm', 'properties.id_norm', 'valor_venda', 'SP', {}
+        ).to_json()
+
+    info = {'linhas_view': len(raw), 'linhas_filtradas': len(filtered), 'malhas': 'store' if geo_sp else 'sintetica'}
+    return cases, info
+
+# O pipeline roda num processo separado: o pico é o RSS do processo (inclui buffers do pyarrow
+# e do driver, que o tracemalloc não enxerga) e o tracemalloc não distorce o tempo da carga
+def measure_upload(data_dir, database_url, mode, workers):
+    command = [
+        sys.executable, os.path.join(PIPELINE_DIR, 'upload_olist.py'),
+        '--mode', mode, '--workers', str(workers), '--data-folder', data_dir, '--skip-rollups'
+    ]
+    start = time.perf_counter()
+    subprocess.run(command, cwd=PIPELINE_DIR, env={**os.environ, 'DATABASE_URL': database_url}, check=True)
+    elapsed = time.perf_counter() - start
+    return {
+        'tempo_mediana_s': elapsed,
+        'tempo_min_s': elapsed,
+        'pico_memoria_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'repeticoes': 1
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=BENCH_DIR).stdout.strip()
+    except Exception:
+        return None
+
+def run(scale, repeat=5, database_url=None, upload_mode=None, workers=4):
+    data_dir = dataset_dir(scale)
+    if not os.path.exists(os.path.join(data_dir, VIEW_FILE)):
+        generate(scale)
+
+    cases, info = dashboard_cases(data_dir)
+    results = {}
+    for name, fn in cases.items():
+        results[name] = measure(fn, repeat)
+        print(f"{name:45s} {results[name]['tempo_mediana_s'] * 1000:10.1f} ms {results[name]['pico_memoria_mb']:9.1f} MB")
+
+    if database_url:
+        sqlite = database_url.startswith('sqlite')
+        mode = upload_mode or ('to_sql' if sqlite else 'stream')
+        name = f"pipeline.upload_{mode}"
+        # SQLite não aceita escritas concorrentes: uma tabela por vez
+        results[name] = measure_upload(data_dir, database_url, mode, 1 if sqlite else workers)
+        print(f"{name:45s} {results[name]['tempo_mediana_s'] * 1000:10.1f} ms {results[name]['pico_memoria_mb']:9.1f} MB")
+
+    return {
+        'meta': {
+            'escala': scale,
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'consulta': {'periodo': [str(d) for d in QUERY[0]], 'estados': QUERY[1]},
+            **info
+        },
+        'resultados': results
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks do dashboard sobre dados sintéticos")
+    parser.add_argument('--scale', type=float, default=1, help="Escala do dataset (1, 10, 100...)")
+    parser.add_argument('--repeat', type=int, default=5, help="Execuções cronometradas por caso")
+    parser.add_argument('--database-url', default=None,
+                        help="Banco descartável para medir o pipeline de carga (as tabelas são recriadas). "
+                             "PostgreSQL local ou sqlite:///arquivo.db")
+    parser.add_argument('--upload-mode', default=None, help="Modo do upload_olist (padrão: stream no PostgreSQL, to_sql no SQLite)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--out', default=None, help="Arquivo JSON de saída (padrão: benchmarks/results/<data>-x<escala>.json)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args.scale, args.repeat, args.database_url, args.upload_mode, args.workers)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-x{args.scale:g}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados salvos em {out}")
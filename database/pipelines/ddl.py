@@ -0,0 +1,265 @@
+import os
+import time
+import hashlib
+import argparse
+import statistics
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+from schemas import TABLE_SCHEMAS, get_schema, create_table_sql
+from streaming import raw_transaction
+
+# DDL mantido pelo pipeline: chaves primárias, chaves estrangeiras, índices de join/filtro
+# e a vw_analise_vendas como view materializada (atualizada ao final de cada carga)
+
+VIEW_NAME = 'vw_analise_vendas'
+
+# Definição usada quando o banco não tem a view (ou com --replace-view): itens de pedidos
+# entregues, categoria opcional (LEFT JOIN) e dias_atraso como a parte inteira dos dias entre
+# a entrega e a data estimada (EXTRACT DAY trunca em direção a zero). Uma view comum que já
+# existe é materializada com a própria definição, então os números do dashboard não mudam.
+VIEW_SQL = """
+    SELECT o.order_id,
+           oi.order_item_id,
+           o.order_purchase_timestamp,
+           o.order_delivered_customer_date,
+           c.customer_city AS cidade_cliente,
+           c.customer_state AS estado_cliente,
+           p.product_category_name,
+           oi.price AS valor_venda,
+           oi.freight_value AS valor_frete,
+           EXTRACT(DAY FROM o.order_delivered_customer_date - o.order_estimated_delivery_date)::integer AS dias_atraso
+    FROM orders o
+    JOIN order_items oi USING (order_id)
+    JOIN customers c USING (customer_id)
+    LEFT JOIN products p USING (product_id)
+    WHERE o.order_status = 'delivered'
+"""
+
+# O índice único é o que permite o REFRESH ... CONCURRENTLY (o dashboard lê a versão anterior durante a atualização)
+VIEW_INDEXES = {
+    f'ux_{VIEW_NAME}_item': ('UNIQUE', ['order_id', 'order_item_id']),
+    f'ix_{VIEW_NAME}_periodo': ('', ['order_purchase_timestamp']),
+    f'ix_{VIEW_NAME}_estado': ('', ['estado_cliente', 'order_purchase_timestamp'])
+}
+
+# Formato das consultas do dashboard (etl/repository.py) para o relatório de latência.
+# {vendas} é a view materializada ou, antes dela existir, a definição da view como subconsulta.
+LOGISTICS_BASE = """
+    FROM order_items oi
+    JOIN products p ON oi.product_id = p.product_id
+    JOIN orders o ON oi.order_id = o.order_id
+    JOIN customers c ON o.customer_id = c.customer_id
+    JOIN sellers s ON oi.seller_id = s.seller_id
+    WHERE o.order_status = 'delivered'
+"""
+
+REPORT_QUERIES = {
+    'vendas.completa': "SELECT * FROM {vendas}",
+    'vendas.semestre_sp_rj': """
+        SELECT * FROM {vendas}
+        WHERE order_purchase_timestamp >= '2018-01-01' AND order_purchase_timestamp < '2018-07-01'
+          AND estado_cliente IN ('SP', 'RJ')
+    """,
+    'logistica.estados': f"""
+        SELECT c.customer_state, AVG(oi.freight_value), COUNT(*) {LOGISTICS_BASE}
+        GROUP BY c.customer_state
+    """,
+    'logistica.categorias': f"""
+        SELECT p.product_category_name, AVG(oi.freight_value / NULLIF(oi.price, 0)) * 100, COUNT(oi.price) {LOGISTICS_BASE}
+        GROUP BY p.product_category_name
+    """,
+    'pedido.itens': """
+        SELECT * FROM order_items oi JOIN products p USING (product_id)
+        WHERE oi.order_id = (SELECT order_id FROM orders ORDER BY order_purchase_timestamp DESC NULLS LAST LIMIT 1)
+    """,
+    'pagamentos': "SELECT payment_type, count(order_id) FROM payments GROUP BY payment_type"
+}
+
+def pk_name(table_name):
+    return f'pk_{table_name}'
+
+def fk_name(table_name, column):
+    return f'fk_{table_name}_{column}'
+
+def index_name(table_name, columns):
+    return f"ix_{table_name}_{'_'.join(columns)}"
+
+# Origem da definição gravada como comentário da view materializada: 'pipeline <hash do VIEW_SQL>'
+# (recriada quando o SQL muda) ou 'original <hash>' (definição da view comum que existia antes)
+def _tag(origin, definition):
+    return f"{origin} {hashlib.md5(definition.encode('utf-8')).hexdigest()}"
+
+def view_version():
+    return _tag('pipeline', VIEW_SQL)
+
+def _relkind(cur, name):
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (name,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def _view_columns(cur):
+    cur.execute("SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped", (VIEW_NAME,))
+    return {row[0] for row in cur.fetchall()}
+
+def _has_unique_index(cur):
+    cur.execute("SELECT 1 FROM pg_index WHERE indrelid = to_regclass(%s) AND indisunique", (VIEW_NAME,))
+    return cur.fetchone() is not None
+
+def _has_constraint(cur, name):
+    cur.execute("SELECT 1 FROM pg_constraint WHERE conname = %s", (name,))
+    return cur.fetchone() is not None
+
+def _columns(columns):
+    return ', '.join(f'"{col}"' for col in columns)
+
+def _try(cur, label, sql):
+    # Cada restrição num SAVEPOINT: dado inconsistente (ex.: chave duplicada) gera aviso, não derruba a carga
+    cur.execute("SAVEPOINT ddl")
+    try:
+        cur.execute(sql)
+        cur.execute("RELEASE SAVEPOINT ddl")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT ddl")
+        print(f"⚠️ {label} não criado: {str(e).strip().splitlines()[0]}")
+
+def ensure_tables(engine):
+    with raw_transaction(engine) as cur:
+        for table_name in TABLE_SCHEMAS:
+            cur.execute(create_table_sql(table_name, if_not_exists=True))
+
+# Sem FKs a ordem de TRUNCATE/COPY (ou DELETE + INSERT da carga incremental) entre tabelas
+# carregadas em paralelo não importa. Na carga completa os índices e PKs também saem, e o COPY
+# não paga a manutenção linha a linha; tudo volta (e é validado) em apply_constraints.
+def drop_constraints(engine, foreign_keys_only=False):
+    with raw_transaction(engine) as cur:
+        for table_name, schema in TABLE_SCHEMAS.items():
+            for column in schema.get('foreign_keys', {}):
+                cur.execute(f'ALTER TABLE "{table_name}" DROP CONSTRAINT IF EXISTS "{fk_name(table_name, column)}"')
+        if foreign_keys_only: return
+
+        for table_name, schema in TABLE_SCHEMAS.items():
+            for columns in schema.get('indexes', []):
+                cur.execute(f'DROP INDEX IF EXISTS "{index_name(table_name, columns)}"')
+            cur.execute(f'ALTER TABLE "{table_name}" DROP CONSTRAINT IF EXISTS "{pk_name(table_name)}"')
+
+def apply_constraints(engine):
+    start = time.perf_counter()
+    with raw_transaction(engine) as cur:
+        for table_name, schema in TABLE_SCHEMAS.items():
+            if schema.get('key') and not _has_constraint(cur, pk_name(table_name)):
+                _try(cur, f"PK de '{table_name}'",
+                     f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{pk_name(table_name)}" PRIMARY KEY ({_columns(schema["key"])})')
+            for columns in schema.get('indexes', []):
+                cur.execute(f'CREATE INDEX IF NOT EXISTS "{index_name(table_name, columns)}" ON "{table_name}" ({_columns(columns)})')
+
+        # FKs depois de todas as PKs (a tabela referenciada precisa da chave)
+        for table_name, schema in TABLE_SCHEMAS.items():
+            for column, ref_table in schema.get('foreign_keys', {}).items():
+                name = fk_name(table_name, column)
+                if _has_constraint(cur, name): continue
+                ref_key = _columns(get_schema(ref_table)['key'])
+                _try(cur, f"FK {name}",
+                     f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{name}" FOREIGN KEY ("{column}") REFERENCES "{ref_table}" ({ref_key})')
+
+        for table_name in TABLE_SCHEMAS:
+            cur.execute(f'ANALYZE "{table_name}"')
+    print(f"🔑 Chaves, índices e estatísticas aplicados em {time.perf_counter() - start:.1f}s")
+
+def _create_view(cur, kind, definition, tag):
+    if kind == 'v':
+        cur.execute(f"DROP VIEW {VIEW_NAME}")
+    elif kind == 'm':
+        cur.execute(f"DROP MATERIALIZED VIEW {VIEW_NAME}")
+    cur.execute(f"CREATE MATERIALIZED VIEW {VIEW_NAME} AS {definition}")
+
+    # Só os índices cujas colunas a definição tem; o único pode falhar com linhas repetidas
+    # (a view segue sem REFRESH CONCURRENTLY)
+    columns = _view_columns(cur)
+    for name, (unique, index_columns) in VIEW_INDEXES.items():
+        if set(index_columns) <= columns:
+            _try(cur, f"Índice {name}", f'CREATE {unique} INDEX "{name}" ON {VIEW_NAME} ({_columns(index_columns)})')
+    cur.execute(f"COMMENT ON MATERIALIZED VIEW {VIEW_NAME} IS '{tag}'")
+
+# Sem replace, a definição que já está no banco é preservada: uma view comum vira materializada
+# com o mesmo SELECT (pg_get_viewdef) e uma materializada que não foi criada pelo pipeline só é
+# atualizada. Com replace (--replace-view), ambas passam a usar o VIEW_SQL.
+def refresh_sales_view(engine, replace=False):
+    start = time.perf_counter()
+    with raw_transaction(engine) as cur:
+        kind = _relkind(cur, VIEW_NAME)
+        cur.execute("SELECT obj_description(to_regclass(%s), 'pg_class')", (VIEW_NAME,))
+        current = cur.fetchone()[0] or ''
+        outdated = current != view_version() and (replace or current.startswith('pipeline '))
+
+        if kind == 'v' and not replace:
+            cur.execute("SELECT pg_get_viewdef(to_regclass(%s), true)", (VIEW_NAME,))
+            definition = cur.fetchone()[0].strip().rstrip(';')
+            _create_view(cur, kind, definition, _tag('original', definition))
+            action = 'criada a partir da view existente'
+        elif kind == 'm' and not outdated:
+            concurrently = 'CONCURRENTLY ' if _has_unique_index(cur) else ''
+            cur.execute(f"REFRESH MATERIALIZED VIEW {concurrently}{VIEW_NAME}")
+            action = 'atualizada'
+        else:
+            _create_view(cur, kind, VIEW_SQL, view_version())
+            action = 'criada com a definição do pipeline'
+        cur.execute(f"ANALYZE {VIEW_NAME}")
+    print(f"🪟 View materializada '{VIEW_NAME}' {action} em {time.perf_counter() - start:.1f}s")
+
+# Versão da carga lida pelo dashboard (etl/repository.get_load_version): trocada depois que view,
+# rollups e índice de CEP foram atualizados. É o horário da troca, então versões comparam como texto.
+LOAD_VERSION_TABLE = 'etl_load_version'
+
+def save_load_version(engine):
+    with raw_transaction(engine) as cur:
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {LOAD_VERSION_TABLE} (version TEXT NOT NULL, updated_at TIMESTAMP NOT NULL)")
+        cur.execute(f"DELETE FROM {LOAD_VERSION_TABLE}")
+        cur.execute(f"""
+            INSERT INTO {LOAD_VERSION_TABLE} (version, updated_at)
+            SELECT to_char(now, 'YYYYMMDD"T"HH24MISSUS'), now FROM (SELECT clock_timestamp()::timestamp AS now) t
+        """)
+        cur.execute(f"SELECT version FROM {LOAD_VERSION_TABLE}")
+        return cur.fetchone()[0]
+
+def finish_load(engine, replace_view=False):
+    apply_constraints(engine)
+    refresh_sales_view(engine, replace_view)
+
+# Antes: a definição da view executada a cada consulta (como a view comum); depois: a materializada
+def time_queries(engine, materialized, repeat=3):
+    vendas = VIEW_NAME if materialized else f"({VIEW_SQL}) AS v"
+    with raw_transaction(engine) as cur:
+        timings = {}
+        for name, query in REPORT_QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cur.execute(query.format(vendas=vendas))
+                cur.fetchall()
+                samples.append(time.perf_counter() - start)
+            timings[name] = statistics.median(samples)
+    return timings
+
+def print_timing_report(before, after):
+    print(f"\n{'consulta':28s} {'antes (ms)':>12s} {'depois (ms)':>12s} {'ganho':>8s}")
+    for name in REPORT_QUERIES:
+        a, b = before[name] * 1000, after[name] * 1000
+        print(f"{name:28s} {a:12.1f} {b:12.1f} {a / b if b else float('inf'):7.1f}x")
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        description="Aplica chaves, índices e a vw_analise_vendas materializada num banco já carregado"
+    )
+    parser.add_argument('--timing-report', action='store_true', help="Mede a latência das consultas antes e depois")
+    parser.add_argument('--replace-view', action='store_true',
+                        help="Troca uma vw_analise_vendas existente (comum ou materializada) pela definição do pipeline")
+    args = parser.parse_args()
+
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    before = time_queries(engine, materialized=False) if args.timing_report else None
+    ensure_tables(engine)
+    finish_load(engine, args.replace_view)
+    save_load_version(engine)
+    if before:
+        print_timing_report(before, time_queries(engine, materialized=True))
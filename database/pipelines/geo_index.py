@@ -0,0 +1,40 @@
+import time
+from streaming import raw_transaction
+
+# Índice de CEP: a tabela geolocation tem ~1M pontos com muitas repetições por prefixo de CEP.
+# Um GROUP BY no banco reduz tudo a um centróide por prefixo (~19k linhas), com a cidade e a
+# UF mais frequentes. Pontos fora do retângulo do Brasil (erros de digitação da base) ficam de fora.
+GEO_INDEX_TABLE = 'geo_cep'
+
+BRAZIL_BOUNDS = {'lat': (-34.0, 5.5), 'lng': (-74.0, -34.5)}
+
+GEO_INDEX_SQL = f"""
+    SELECT geolocation_zip_code_prefix AS zip_code_prefix,
+           AVG(geolocation_lat) AS lat,
+           AVG(geolocation_lng) AS lng,
+           MODE() WITHIN GROUP (ORDER BY geolocation_city) AS cidade,
+           MODE() WITHIN GROUP (ORDER BY geolocation_state) AS estado,
+           COUNT(*) AS qtd_pontos
+    FROM geolocation
+    WHERE geolocation_zip_code_prefix IS NOT NULL
+      AND geolocation_lat BETWEEN {BRAZIL_BOUNDS['lat'][0]} AND {BRAZIL_BOUNDS['lat'][1]}
+      AND geolocation_lng BETWEEN {BRAZIL_BOUNDS['lng'][0]} AND {BRAZIL_BOUNDS['lng'][1]}
+    GROUP BY geolocation_zip_code_prefix
+"""
+
+def refresh_geo_index(engine):
+    start = time.perf_counter()
+
+    # Mesmo padrão dos rollups: DELETE + INSERT numa transação, o dashboard lê a versão anterior até o COMMIT
+    with raw_transaction(engine) as cur:
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {GEO_INDEX_TABLE} AS {GEO_INDEX_SQL} WITH NO DATA")
+        cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{GEO_INDEX_TABLE}_prefixo ON {GEO_INDEX_TABLE} (zip_code_prefix)")
+        cur.execute(f"DELETE FROM {GEO_INDEX_TABLE}")
+        cur.execute(f"INSERT INTO {GEO_INDEX_TABLE} {GEO_INDEX_SQL}")
+        rows = cur.rowcount
+        cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass('geolocation')")
+        source = cur.fetchone()[0]
+        cur.execute(f"ANALYZE {GEO_INDEX_TABLE}")
+
+    ratio = f" ({source / rows:.0f}x menor)" if rows and source > 0 else ""
+    print(f"📍 Índice de CEP '{GEO_INDEX_TABLE}' atualizado: {rows} prefixos{ratio} em {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,66 @@
+import time
+from streaming import raw_transaction
+
+# Agregados diários servidos ao dashboard no lugar da vw_analise_vendas.
+# soma_dias_atraso considera apenas os itens atrasados (dias_atraso > 0).
+ROLLUPS = {
+    'rollup_vendas': """
+        SELECT order_purchase_timestamp::date AS dia,
+               estado_cliente,
+               product_category_name,
+               SUM(valor_venda) AS valor_venda,
+               SUM(valor_frete) AS valor_frete,
+               COUNT(*) AS qtd_itens,
+               COUNT(*) FILTER (WHERE dias_atraso > 0) AS qtd_atrasos,
+               COALESCE(SUM(dias_atraso) FILTER (WHERE dias_atraso > 0), 0) AS soma_dias_atraso
+        FROM vw_analise_vendas
+        GROUP BY 1, 2, 3
+    """,
+    # Cada pedido tem uma única data e um único estado, então a contagem distinta
+    # nesse grão pode ser somada para qualquer período/conjunto de estados
+    'rollup_pedidos': """
+        SELECT order_purchase_timestamp::date AS dia,
+               estado_cliente,
+               COUNT(DISTINCT order_id) AS qtd_pedidos
+        FROM vw_analise_vendas
+        GROUP BY 1, 2
+    """,
+    # Pedidos distintos por categoria não somam entre categorias: HyperLogLog esparso das
+    # order_id (etl/sketch.py, PRECISION = 12) no grão dia × estado × categoria.
+    # Registro = 12 bits baixos do hash; rho = posição do primeiro bit 1 nos 52 bits restantes.
+    'rollup_pedidos_hll': """
+        SELECT dia, estado_cliente, product_category_name, registro, MAX(rho)::smallint AS rho
+        FROM (
+            SELECT order_purchase_timestamp::date AS dia,
+                   estado_cliente,
+                   product_category_name,
+                   (h & 4095)::smallint AS registro,
+                   CASE WHEN (h >> 12) & 4503599627370495 = 0 THEN 53
+                        ELSE position('1' IN ((h >> 12) & 4503599627370495)::bit(64)::text) - 12
+                   END AS rho
+            FROM (SELECT *, hashtextextended(order_id, 0) AS h FROM vw_analise_vendas) v
+        ) s
+        GROUP BY 1, 2, 3, 4
+    """
+}
+
+# Filtro do dashboard (período e estados): os sketches são combinados no banco a cada recorte
+ROLLUP_INDEXES = {
+    'rollup_pedidos_hll': ['dia', 'estado_cliente']
+}
+
+def refresh_rollups(engine):
+    for table_name, query in ROLLUPS.items():
+        start = time.perf_counter()
+
+        # DELETE + INSERT na mesma transação: o dashboard continua lendo a versão anterior até o COMMIT
+        with raw_transaction(engine) as cur:
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {table_name} AS {query} WITH NO DATA")
+            if table_name in ROLLUP_INDEXES:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS ix_{table_name}_filtro ON {table_name} ({', '.join(ROLLUP_INDEXES[table_name])})")
+            cur.execute(f"DELETE FROM {table_name}")
+            cur.execute(f"INSERT INTO {table_name} {query}")
+            rows = cur.rowcount
+            cur.execute(f"ANALYZE {table_name}")
+
+        print(f"📦 Rollup '{table_name}' atualizado: {rows} linhas em {time.perf_counter() - start:.1f}s")
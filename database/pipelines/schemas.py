@@ -0,0 +1,180 @@
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# Formato dos timestamps exportados pela Olist; ISO8601 fica como fallback
+TIMESTAMP_FORMATS = ['%Y-%m-%d %H:%M:%S', pa_csv.ISO8601]
+
+STRING = pa.string()
+INT = pa.int64()
+FLOAT = pa.float64()
+TIMESTAMP = pa.timestamp('s')
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Registro de schemas por tabela: tipo de cada coluna (na ordem do CSV),
+# formatos de data aceitos, colunas de baixa cardinalidade (categóricas),
+# chave natural e coluna de watermark usadas na carga incremental.
+# Tabelas sem watermark usam hash de linha; sem chave, a carga é só de inserção.
+# A chave vira PRIMARY KEY; foreign_keys (coluna -> tabela) e indexes (colunas de
+# join e filtro) são criados pelo ddl.py ao final da carga.
+TABLE_SCHEMAS = {
+    'orders': {
+        'columns': {
+            'order_id': STRING,
+            'customer_id': STRING,
+            'order_status': CATEGORY,
+            'order_purchase_timestamp': TIMESTAMP,
+            'order_approved_at': TIMESTAMP,
+            'order_delivered_carrier_date': TIMESTAMP,
+            'order_delivered_customer_date': TIMESTAMP,
+            'order_estimated_delivery_date': TIMESTAMP
+        },
+        'timestamp_formats': TIMESTAMP_FORMATS,
+        'key': ['order_id'],
+        'watermark': 'order_purchase_timestamp',
+        'foreign_keys': {'customer_id': 'customers'},
+        'indexes': [['customer_id'], ['order_status', 'order_purchase_timestamp']]
+    },
+    'order_items': {
+        'columns': {
+            'order_id': STRING,
+            'order_item_id': INT,
+            'product_id': STRING,
+            'seller_id': STRING,
+            'shipping_limit_date': TIMESTAMP,
+            'price': FLOAT,
+            'freight_value': FLOAT
+        },
+        'timestamp_formats': TIMESTAMP_FORMATS,
+        'key': ['order_id', 'order_item_id'],
+        'watermark': 'shipping_limit_date',
+        'foreign_keys': {'order_id': 'orders', 'product_id': 'products', 'seller_id': 'sellers'},
+        'indexes': [['product_id'], ['seller_id']]
+    },
+    'products': {
+        'columns': {
+            'product_id': STRING,
+            'product_category_name': CATEGORY,
+            'product_name_lenght': FLOAT,
+            'product_description_lenght': FLOAT,
+            'product_photos_qty': FLOAT,
+            'product_weight_g': FLOAT,
+            'product_length_cm': FLOAT,
+            'product_height_cm': FLOAT,
+            'product_width_cm': FLOAT
+        },
+        'key': ['product_id']
+    },
+    'customers': {
+        'columns': {
+            'customer_id': STRING,
+            'customer_unique_id': STRING,
+            'customer_zip_code_prefix': INT,
+            'customer_city': CATEGORY,
+            'customer_state': CATEGORY
+        },
+        'key': ['customer_id']
+    },
+    'sellers': {
+        'columns': {
+            'seller_id': STRING,
+            'seller_zip_code_prefix': INT,
+            'seller_city': CATEGORY,
+            'seller_state': CATEGORY
+        },
+        'key': ['seller_id']
+    },
+    'payments': {
+        'columns': {
+            'order_id': STRING,
+            'payment_sequential': INT,
+            'payment_type': CATEGORY,
+            'payment_installments': INT,
+            'payment_value': FLOAT
+        },
+        'key': ['order_id', 'payment_sequential'],
+        'foreign_keys': {'order_id': 'orders'}
+    },
+    'reviews': {
+        'columns': {
+            'review_id': STRING,
+            'order_id': STRING,
+            'review_score': INT,
+            'review_comment_title': STRING,
+            'review_comment_message': STRING,
+            'review_creation_date': TIMESTAMP,
+            'review_answer_timestamp': TIMESTAMP
+        },
+        'timestamp_formats': TIMESTAMP_FORMATS,
+        # Comentários dos clientes podem conter quebras de linha entre aspas
+        'newlines_in_values': True,
+        'key': ['review_id', 'order_id'],
+        'watermark': 'review_answer_timestamp',
+        'foreign_keys': {'order_id': 'orders'},
+        'indexes': [['order_id']]
+    },
+    'geolocation': {
+        'columns': {
+            'geolocation_zip_code_prefix': INT,
+            'geolocation_lat': FLOAT,
+            'geolocation_lng': FLOAT,
+            'geolocation_city': CATEGORY,
+            'geolocation_state': CATEGORY
+        }
+    },
+    'category_translation': {
+        'columns': {
+            'product_category_name': STRING,
+            'product_category_name_english': STRING
+        },
+        'key': ['product_category_name']
+    }
+}
+
+PG_TYPES = {
+    STRING: 'TEXT',
+    CATEGORY: 'TEXT',
+    INT: 'BIGINT',
+    FLOAT: 'DOUBLE PRECISION',
+    TIMESTAMP: 'TIMESTAMP'
+}
+
+PANDAS_TYPES = {
+    CATEGORY: 'category',
+    INT: 'Int64',
+    FLOAT: 'float64'
+}
+
+def get_schema(table_name):
+    return TABLE_SCHEMAS[table_name]
+
+def timestamp_columns(table_name):
+    return [col for col, dtype in get_schema(table_name)['columns'].items() if dtype == TIMESTAMP]
+
+def categorical_columns(table_name):
+    return [col for col, dtype in get_schema(table_name)['columns'].items() if dtype == CATEGORY]
+
+def pandas_dtypes(table_name):
+    return {
+        col: PANDAS_TYPES[dtype]
+        for col, dtype in get_schema(table_name)['columns'].items()
+        if dtype in PANDAS_TYPES
+    }
+
+def create_table_sql(table_name, if_not_exists=False):
+    columns = ',\n    '.join(
+        f'"{col}" {PG_TYPES[dtype]}' for col, dtype in get_schema(table_name)['columns'].items()
+    )
+    guard = 'IF NOT EXISTS ' if if_not_exists else ''
+    return f'CREATE TABLE {guard}"{table_name}" (\n    {columns}\n)'
+
+def csv_format(table_name, block_size):
+    schema = get_schema(table_name)
+    return {
+        'read_options': pa_csv.ReadOptions(use_threads=True, block_size=block_size),
+        'parse_options': pa_csv.ParseOptions(newlines_in_values=schema.get('newlines_in_values', False)),
+        'convert_options': pa_csv.ConvertOptions(
+            column_types=schema['columns'],
+            timestamp_parsers=schema.get('timestamp_formats', TIMESTAMP_FORMATS),
+            strings_can_be_null=True
+        )
+    }
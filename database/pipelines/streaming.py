@@ -0,0 +1,66 @@
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import io
+from contextlib import contextmanager
+from schemas import get_schema, csv_format
+
+# Leitura em streaming: bytes processados por bloco do parser e linhas por lote enviado
+BLOCK_SIZE = 8 << 20
+BATCH_ROWS = 50_000
+
+@contextmanager
+def raw_transaction(engine):
+    conn = engine.raw_connection()
+    # Cursor fechado à mão: o do sqlite3 não é context manager
+    cur = conn.cursor()
+    try:
+        yield cur
+        cur.close()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def copy_sql(table_name, columns):
+    column_list = ', '.join(f'"{col}"' for col in columns)
+    return f'COPY "{table_name}" ({column_list}) FROM STDIN WITH (FORMAT csv)'
+
+def copy_arrow(cur, table_name, batch):
+    buffer = io.BytesIO()
+    pa_csv.write_csv(batch, buffer, pa_csv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    cur.copy_expert(copy_sql(table_name, batch.schema.names), buffer)
+
+def iter_batches(file_path, table_name, batch_rows=BATCH_ROWS):
+    # O scanner do pyarrow decodifica os blocos em paralelo com readahead limitado;
+    # aqui os lotes são reagrupados em tamanho fixo para o COPY
+    dataset = ds.dataset(file_path, format=ds.CsvFileFormat(**csv_format(table_name, BLOCK_SIZE)))
+    columns = list(get_schema(table_name)['columns'])
+
+    pending, pending_rows = [], 0
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_rows, use_threads=True):
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= batch_rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, batch_rows)
+            rest = table.slice(batch_rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+
+    if pending_rows:
+        yield pa.Table.from_batches(pending)
+
+def load_stream(engine, file_path, table_name, batch_rows=BATCH_ROWS):
+    rows = 0
+
+    # Esvazia a tabela e envia os lotes na mesma transação: quem consulta nunca vê a tabela pela metade.
+    # TRUNCATE em vez de DROP: a view materializada e as chaves dependem da tabela
+    with raw_transaction(engine) as cur:
+        cur.execute(f'TRUNCATE "{table_name}"')
+        for batch in iter_batches(file_path, table_name, batch_rows):
+            copy_arrow(cur, table_name, batch)
+            rows += batch.num_rows
+    return rows
@@ -1,71 +1,206 @@
 import pandas as pd
 from sqlalchemy import create_engine
 from sqlalchemy import text
+import io
 import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from schemas import TIMESTAMP_FORMATS, get_schema, timestamp_columns, pandas_dtypes
+from streaming import raw_transaction, copy_sql, load_stream
+from incremental import ensure_state_tables, reset_hashes, load_incremental, DEFAULT_LOOKBACK_DAYS
+from rollups import refresh_rollups
+from geo_index import refresh_geo_index
+from ddl import ensure_tables, drop_constraints, finish_load, save_load_version, time_queries, print_timing_report
 
 # Carrega a senha do banco do arquivo .env
 load_dotenv()
 DB_URL = os.getenv("DATABASE_URL")
 
 # Caminho da pasta onde estão os CSVs (ajuste se necessário)
-DATA_FOLDER = '../db.Olist' 
+DATA_FOLDER = '../db.Olist'
 
-def upload_data():
+# Dicionário mapeando Nome do Arquivo -> Nome da Tabela no Banco
+FILES_MAP = {
+    'olist_orders_dataset.csv': 'orders',
+    'olist_order_items_dataset.csv': 'order_items',
+    'olist_products_dataset.csv': 'products',
+    'olist_customers_dataset.csv': 'customers',
+    'olist_sellers_dataset.csv': 'sellers',
+    'olist_order_payments_dataset.csv': 'payments',
+    'olist_order_reviews_dataset.csv': 'reviews',
+    'olist_geolocation_dataset.csv': 'geolocation',
+    'product_category_name_translation.csv': 'category_translation'
+}
+
+# Linhas serializadas por comando COPY dentro da mesma transação
+COPY_CHUNK_ROWS = 100_000
+
+def read_csv(file_path, table_name):
+    schema = get_schema(table_name)
+    df = pd.read_csv(file_path, dtype=pandas_dtypes(table_name))
+
+    # Datas convertidas com o formato declarado no schema (sem inferência por coluna)
+    date_format = schema.get('timestamp_formats', TIMESTAMP_FORMATS)[0]
+    for col in timestamp_columns(table_name):
+        df[col] = pd.to_datetime(df[col], format=date_format, errors='coerce')
+    return df
+
+def load_to_sql(engine, file_path, table_name):
+    df = read_csv(file_path, table_name)
+
+    # TRUNCATE + INSERTs na mesma transação (a tabela não é recriada: a view materializada depende dela).
+    # Fora do PostgreSQL (ex.: SQLite dos benchmarks) não há DDL do pipeline e o pandas recria a tabela.
+    # chunksize=1000 envia de mil em mil para não travar a conexão
+    with engine.begin() as conn:
+        postgres = conn.dialect.name == 'postgresql'
+        if postgres:
+            conn.execute(text(f'TRUNCATE "{table_name}"'))
+        df.to_sql(table_name, conn, if_exists='append' if postgres else 'replace', index=False, chunksize=1000)
+    return len(df)
+
+def load_copy(engine, file_path, table_name):
+    df = read_csv(file_path, table_name)
+
+    # Esvazia a tabela e envia as linhas via COPY FROM STDIN na mesma transação
+    sql = copy_sql(table_name, df.columns)
+    with raw_transaction(engine) as cur:
+        cur.execute(f'TRUNCATE "{table_name}"')
+        for start in range(0, len(df), COPY_CHUNK_ROWS):
+            buffer = io.StringIO()
+            df.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cur.copy_expert(sql, buffer)
+    return len(df)
+
+LOADERS = {
+    'stream': load_stream,
+    'incremental': load_incremental,
+    'copy': load_copy,
+    'to_sql': load_to_sql
+}
+
+def load_table(engine, file_path, table_name, mode, **options):
+    start = time.perf_counter()
+
+    print(f"Enviando {os.path.basename(file_path)} para a tabela '{table_name}' ({mode})...")
+    rows = LOADERS[mode](engine, file_path, table_name, **options)
+
+    return rows, time.perf_counter() - start
+
+def upload_data(mode='stream', workers=4, data_folder=DATA_FOLDER, lookback_days=DEFAULT_LOOKBACK_DAYS, rollups=True,
+                timing_report=False, replace_view=False):
     if not DB_URL:
         print("ERRO: Variável DATABASE_URL não encontrada no .env")
         return
 
     print("Conectando ao Supabase...")
-    engine = create_engine(DB_URL)
-
-    # Dicionário mapeando Nome do Arquivo -> Nome da Tabela no Banco
-    files_map = {
-        'olist_orders_dataset.csv': 'orders',
-        'olist_order_items_dataset.csv': 'order_items',
-        'olist_products_dataset.csv': 'products',
-        'olist_customers_dataset.csv': 'customers',
-        'olist_sellers_dataset.csv': 'sellers',
-        'olist_order_payments_dataset.csv': 'payments',
-        'olist_order_reviews_dataset.csv': 'reviews',
-        'olist_geolocation_dataset.csv': 'geolocation',
-        'product_category_name_translation.csv': 'category_translation'
-    }
-
-    # Colunas que PRECISAM ser convertidas para data (datetime)
-    date_columns = [
-        'order_purchase_timestamp', 
-        'order_approved_at', 
-        'order_delivered_carrier_date', 
-        'order_delivered_customer_date', 
-        'order_estimated_delivery_date',
-        'shipping_limit_date',
-        'review_creation_date',
-        'review_answer_timestamp'
-    ]
-
-    for csv_file, table_name in files_map.items():
-        file_path = os.path.join(DATA_FOLDER, csv_file)
-        
+    engine = create_engine(DB_URL, pool_size=max(workers, 5))
+
+    # DDL, chaves, view materializada, rollups e índice de CEP são do PostgreSQL. Em outro banco
+    # (ex.: SQLite dos benchmarks) só os INSERTs do to_sql rodam; os modos com COPY não existem lá
+    postgres = engine.dialect.name == 'postgresql'
+    if not postgres and mode != 'to_sql':
+        print(f"ERRO: o modo '{mode}' usa COPY e só funciona no PostgreSQL (use --mode to_sql)")
+        return
+
+    pending = {}
+    for csv_file, table_name in FILES_MAP.items():
+        file_path = os.path.join(data_folder, csv_file)
         if os.path.exists(file_path):
-            print(f"Lendo {csv_file}...")
-            df = pd.read_csv(file_path)
-
-            # Conversão automática de colunas de data
-            for col in df.columns:
-                if col in date_columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-            
-            print(f"Enviando {len(df)} linhas para a tabela '{table_name}'...")
-            
-            # chunksize=1000 envia de mil em mil para não travar a conexão
-            df.to_sql(table_name, engine, if_exists='replace', index=False, chunksize=1000)
-            print(f"✅ Tabela '{table_name}' carregada com sucesso!")
+            pending[file_path] = table_name
         else:
-            print(f"⚠️ Arquivo {csv_file} não encontrado na pasta {DATA_FOLDER}")
+            print(f"⚠️ Arquivo {csv_file} não encontrado na pasta {data_folder}")
+
+    # As tabelas são criadas uma vez e nunca recriadas. Durante a carga saem as FKs (e, na carga
+    # completa, PKs e índices); a incremental mantém as PKs para o DELETE pela chave
+    options = {}
+    if postgres:
+        ensure_tables(engine)
+        if mode == 'incremental':
+            ensure_state_tables(engine)
+            options['lookback_days'] = lookback_days
+        drop_constraints(engine, foreign_keys_only=mode == 'incremental')
+
+    # As tabelas são independentes entre si, então podem ser carregadas em paralelo
+    wall_start = time.perf_counter()
+    total_rows = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(load_table, engine, file_path, table_name, mode, **options): table_name
+            for file_path, table_name in pending.items()
+        }
+        for future in as_completed(futures):
+            table_name = futures[future]
+            try:
+                rows, elapsed = future.result()
+            except Exception as e:
+                print(f"❌ Falha ao carregar '{table_name}': {e}")
+                continue
+            total_rows += rows
+            rate = rows / elapsed if elapsed > 0 else float('inf')
+            print(f"✅ Tabela '{table_name}' carregada: {rows} linhas em {elapsed:.1f}s ({rate:,.0f} linhas/s)")
+
+    if postgres:
+        finish_postgres(engine, mode, rollups, timing_report, replace_view)
+    else:
+        print(f"ℹ️ Banco {engine.dialect.name}: chaves, view materializada, rollups e índice de CEP não são gerados")
+
+    wall_time = time.perf_counter() - wall_start
 
     print("\n--- Processo Finalizado ---")
+    print(f"Modo: {mode} | Workers: {workers} | {total_rows} linhas em {wall_time:.1f}s")
     print("Todos os dados estão no Supabase prontos para análise SQL.")
 
+def finish_postgres(engine, mode, rollups, timing_report, replace_view=False):
+    # Carga completa: os hashes do modo incremental são refeitos na próxima execução dele
+    if mode != 'incremental':
+        reset_hashes(engine)
+
+    try:
+        before = time_queries(engine, materialized=False) if timing_report else None
+        finish_load(engine, replace_view)
+        if before:
+            print_timing_report(before, time_queries(engine, materialized=True))
+    except Exception as e:
+        print(f"⚠️ Chaves/view materializada não atualizadas: {e}")
+
+    if rollups:
+        try:
+            refresh_rollups(engine)
+        except Exception as e:
+            print(f"⚠️ Rollups não atualizados (a vw_analise_vendas existe?): {e}")
+
+    try:
+        refresh_geo_index(engine)
+    except Exception as e:
+        print(f"⚠️ Índice de CEP não atualizado (a tabela geolocation foi carregada?): {e}")
+
+    # Por último: o dashboard só troca de versão com tudo acima já atualizado
+    print(f"🏷️ Versão da carga: {save_load_version(engine)}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Carga dos CSVs da Olist no PostgreSQL")
+    parser.add_argument('--mode', choices=sorted(LOADERS), default='stream',
+                        help="stream: pyarrow + COPY em lotes (padrão) | incremental: só linhas novas/alteradas | "
+                             "copy: pandas + COPY | to_sql: INSERTs em lotes via pandas")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Quantidade de tabelas carregadas em paralelo")
+    parser.add_argument('--lookback-days', type=int, default=DEFAULT_LOOKBACK_DAYS,
+                        help=f"No modo incremental, reprocessa também as linhas até N dias antes do watermark (padrão: {DEFAULT_LOOKBACK_DAYS})")
+    parser.add_argument('--skip-rollups', action='store_true',
+                        help="Não recalcula as tabelas rollup_* ao final da carga")
+    parser.add_argument('--timing-report', action='store_true',
+                        help="Mede a latência das consultas do dashboard antes e depois de chaves, índices e view materializada")
+    parser.add_argument('--replace-view', action='store_true',
+                        help="Troca uma vw_analise_vendas existente pela definição do pipeline (por padrão ela é preservada)")
+    parser.add_argument('--data-folder', default=DATA_FOLDER,
+                        help="Pasta com os CSVs da Olist")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    upload_data()
\ No newline at end of file
+    args = parse_args()
+    upload_data(mode=args.mode, workers=args.workers, data_folder=args.data_folder,
+                lookback_days=args.lookback_days, rollups=not args.skip_rollups,
+                timing_report=args.timing_report, replace_view=args.replace_view)
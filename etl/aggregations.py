@@ -0,0 +1,150 @@
+import math
+import numpy as np
+import pandas as pd
+
+ROLLUP_KEYS = ['dia', 'estado_cliente', 'product_category_name']
+ROLLUP_MEASURES = ['valor_venda', 'valor_frete', 'qtd_itens', 'qtd_atrasos', 'soma_dias_atraso']
+
+# Mesmo formato das tabelas rollup_vendas / rollup_pedidos geradas pelo pipeline,
+# calculado em pandas quando os rollups não estão disponíveis no banco
+def build_sales_rollup(df):
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_MEASURES)
+
+    atrasado = df['dias_atraso'] > 0
+    base = pd.DataFrame({
+        'dia': df['order_purchase_timestamp'].dt.normalize(),
+        'estado_cliente': df['estado_cliente'],
+        'product_category_name': df['product_category_name'],
+        'valor_venda': df['valor_venda'],
+        'valor_frete': df['valor_frete'],
+        'qtd_itens': 1,
+        'qtd_atrasos': atrasado.astype('int64'),
+        'soma_dias_atraso': df['dias_atraso'].where(atrasado, 0)
+    })
+    return base.groupby(ROLLUP_KEYS, observed=True, dropna=False).sum().reset_index()
+
+def build_orders_rollup(df):
+    if df.empty:
+        return pd.DataFrame(columns=['dia', 'estado_cliente', 'qtd_pedidos'])
+
+    return (
+        df.groupby([df['order_purchase_timestamp'].dt.normalize().rename('dia'), 'estado_cliente'], observed=True)
+        ['order_id'].nunique()
+        .rename('qtd_pedidos')
+        .reset_index()
+    )
+
+# Contagem exata de pedidos distintos por categoria sobre as linhas filtradas
+def build_category_orders(df):
+    return df.groupby('product_category_name', observed=True)['order_id'].nunique().rename('qtd_pedidos')
+
+def filter_rollup(rollup, date_range, states):
+    mask = (
+        (rollup['dia'] >= pd.Timestamp(date_range[0])) &
+        (rollup['dia'] <= pd.Timestamp(date_range[1]))
+    )
+    if states:
+        mask = mask & (rollup['estado_cliente'].isin(states))
+    return rollup.loc[mask]
+
+# qtd_pedidos: exato (rollup_pedidos) ou estimado pelos sketches, com o erro padrão relativo
+# em erro_pedidos (0 quando exato)
+def compute_kpis(vendas, qtd_pedidos, erro_pedidos=0.0):
+    receita = vendas['valor_venda'].sum()
+    qtd_pedidos = int(qtd_pedidos)
+    qtd_itens = vendas['qtd_itens'].sum()
+
+    return {
+        'receita': receita,
+        'pedidos': qtd_pedidos,
+        'ticket': receita / qtd_pedidos if qtd_pedidos > 0 else 0,
+        'frete_medio': vendas['valor_frete'].sum() / qtd_itens if qtd_itens > 0 else float('nan'),
+        'erro_pedidos': erro_pedidos
+    }
+
+# Todas as tabelas consumidas pelos gráficos, derivadas de uma única passada
+# (o rollup dia × estado × categoria do recorte filtrado)
+def build_chart_tables(vendas):
+    vendas = vendas.assign(dia=pd.to_datetime(vendas['dia']))
+
+    mensal = vendas.set_index('dia')[ROLLUP_MEASURES].resample('ME').sum()
+    mensal['taxa_atraso'] = mensal['qtd_atrasos'] / mensal['qtd_itens'] * 100
+
+    estados = vendas.groupby('estado_cliente', observed=True)[ROLLUP_MEASURES].sum()
+    estados['media_dias_atraso'] = (estados['soma_dias_atraso'] / estados['qtd_atrasos']).where(estados['qtd_atrasos'] > 0)
+
+    categorias = vendas.groupby('product_category_name', observed=True)[['valor_venda', 'qtd_itens']].sum()
+    categoria_estado = vendas.groupby(['product_category_name', 'estado_cliente'], observed=True)['valor_venda'].sum()
+
+    atrasados = vendas['qtd_atrasos'].sum()
+    status = pd.DataFrame({
+        'Status': ['Atrasado', 'No Prazo'],
+        'Qtd': [atrasados, vendas['qtd_itens'].sum() - atrasados]
+    }).sort_values('Qtd', ascending=False)
+
+    return {
+        'mensal': mensal.reset_index(),
+        'estados': estados.reset_index(),
+        'categorias': categorias.reset_index(),
+        'categoria_estado': categoria_estado.reset_index(),
+        'status': status
+    }
+
+def _nice_bin_size(rough):
+    # Mesmo arredondamento dos ticks do Plotly: 2, 5 ou 10 vezes uma potência de 10
+    base = 10 ** math.floor(math.log(rough) / math.log(10))
+    return base * next((step for step in (2, 5) if step > rough / base), 10)
+
+def _near_edge(v, start, size):
+    return (1 + (v - start) * 100 / size) % 100 < 2
+
+def _shift_bin_start(start, size, vmin, vmax, n, integral, edge_counts):
+    if integral:
+        # Dados inteiros: bordas em meio inteiro para não haver valor em cima da borda
+        if size < 1: return vmin - 0.5 * size
+        start -= 0.5
+        return start + size if start + size < vmin else start
+
+    edge, mid = edge_counts(start, size)
+    if mid < n * 0.1 and (edge > n * 0.3 or _near_edge(vmin, start, size) or _near_edge(vmax, start, size)):
+        shift = size / 2
+        start += shift if start + shift < vmin else -shift
+    return start
+
+# Bins automáticos do px.histogram(nbins=...): intervalos [início, fim) de tamanho "redondo".
+# A regra só precisa dos extremos, do total de valores, se todos são inteiros e, para valores
+# fracionários, de edge_counts(início, tamanho) -> (valores perto de uma borda, perto do meio
+# de um bin); então também roda com as contagens feitas no banco (etl/duck.py)
+def histogram_layout(vmin, vmax, n, integral, edge_counts, nbins=50):
+    if vmin == vmax:
+        size, start = 1.0, vmin - 0.5
+    else:
+        size = _nice_bin_size((vmax - vmin) / nbins)
+        start = _shift_bin_start((math.ceil(vmin / size) - 1) * size, size, vmin, vmax, n, integral, edge_counts)
+    return start, size, 1 + math.floor((vmax - start) / size)
+
+# Tabela do gráfico a partir do índice do bin de cada valor (ou de cada grupo, com counts)
+def histogram_frame(start, size, count, bins, counts=None):
+    edges = start + size * np.arange(count + 1)
+    bins = np.clip(np.asarray(bins, dtype=np.int64), 0, count - 1)
+    weights = None if counts is None else np.asarray(counts, dtype='float64')
+    return pd.DataFrame({
+        'inicio': edges[:-1],
+        'fim': edges[1:],
+        'centro': edges[:-1] + size / 2,
+        'qtd': np.bincount(bins, weights=weights, minlength=count).astype(np.int64)
+    })
+
+# Histograma calculado no servidor: só as contagens vão para o navegador
+def histogram_bins(values, nbins=50):
+    values = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy(dtype='float64')
+    if not len(values):
+        return pd.DataFrame(columns=['inicio', 'fim', 'centro', 'qtd'])
+
+    def edge_counts(start, size):
+        return _near_edge(values, start, size).sum(), _near_edge(values + size / 2, start, size).sum()
+
+    integral = bool(np.all(np.mod(values, 1) == 0))
+    start, size, count = histogram_layout(values.min(), values.max(), len(values), integral, edge_counts, nbins)
+    return histogram_frame(start, size, count, np.floor((values - start) / size))
@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import threading
+import functools
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+import pandas as pd
+
+# Cache stale-while-revalidate compartilhado pelo processo (todas as sessões do Streamlit):
+# - entrada vencida continua sendo servida enquanto um único refresh roda em segundo plano;
+# - cargas em andamento são deduplicadas (quem chega depois espera a mesma carga);
+# - entradas menos usadas saem quando o total estimado passa do orçamento de memória.
+CACHE_MEMORY_MB = int(os.getenv("CACHE_MEMORY_MB", 2048))
+CACHE_REFRESH_WORKERS = int(os.getenv("CACHE_REFRESH_WORKERS", 2))
+# Resultado rejeitado pelo valid (ex.: banco fora do ar) é tentado de novo depois desse intervalo
+CACHE_RETRY_SECONDS = int(os.getenv("CACHE_RETRY_SECONDS", 60))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_inflight = {}
+_total_bytes = 0
+_stats = defaultdict(lambda: {'hits': 0, 'stale': 0, 'misses': 0, 'waits': 0, 'refreshes': 0, 'errors': 0, 'evictions': 0})
+_executor = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix='cache-refresh')
+
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+def has_data(value):
+    return value is not None and len(value) > 0
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+def _evict():
+    global _total_bytes
+    budget = CACHE_MEMORY_MB * 2 ** 20
+    # A entrada mais recente nunca sai, mesmo sozinha acima do orçamento
+    while _total_bytes > budget and len(_entries) > 1:
+        key, entry = _entries.popitem(last=False)
+        _total_bytes -= entry['size']
+        _stats[key[0]]['evictions'] += 1
+
+def _store(key, value, fresh_for, max_entries=None):
+    global _total_bytes
+    old = _entries.pop(key, None)
+    if old:
+        _total_bytes -= old['size']
+    entry = {'value': value, 'fresh_until': time.monotonic() + fresh_for, 'size': estimate_size(value)}
+    _entries[key] = entry
+    _total_bytes += entry['size']
+
+    # Limite por função (ex.: só a versão atual da carga): saem as entradas menos usadas dela
+    if max_entries:
+        same = [k for k in _entries if k[0] == key[0]]
+        for k in same[:-max_entries]:
+            _total_bytes -= _entries.pop(k)['size']
+            _stats[key[0]]['evictions'] += 1
+    _evict()
+
+def _run(key, func, args, kwargs, ttl, valid, max_entries, future):
+    name = key[0]
+    try:
+        value = func(*args, **kwargs)
+    except BaseException as e:
+        with _lock:
+            _inflight.pop(key, None)
+            _stats[name]['errors'] += 1
+            if key in _entries:
+                _entries[key]['fresh_until'] = time.monotonic() + CACHE_RETRY_SECONDS
+        future.set_exception(e)
+        return
+
+    with _lock:
+        previous = _entries.get(key)
+        if valid is None or valid(value):
+            _store(key, value, ttl, max_entries)
+        elif previous is not None:
+            # Refresh sem dados: mantém a versão anterior e tenta de novo mais tarde
+            previous['fresh_until'] = time.monotonic() + CACHE_RETRY_SECONDS
+            value = previous['value']
+        else:
+            _store(key, value, CACHE_RETRY_SECONDS, max_entries)
+        _inflight.pop(key, None)
+    future.set_result(value)
+
+def _get(name, func, ttl, valid, max_entries, args, kwargs):
+    key = (name, _freeze(args), _freeze(kwargs))
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+            if time.monotonic() < entry['fresh_until']:
+                _stats[name]['hits'] += 1
+                return entry['value']
+
+            _stats[name]['stale'] += 1
+            if key not in _inflight:
+                _stats[name]['refreshes'] += 1
+                future = _inflight[key] = Future()
+                _executor.submit(_run, key, func, args, kwargs, ttl, valid, max_entries, future)
+            return entry['value']
+
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            _stats[name]['misses'] += 1
+            future = _inflight[key] = Future()
+        else:
+            _stats[name]['waits'] += 1
+
+    if owner:
+        _run(key, func, args, kwargs, ttl, valid, max_entries, future)
+    return future.result()
+
+def swr_cache(ttl=3600, valid=None, max_entries=None):
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return _get(name, func, ttl, valid, max_entries, args, kwargs)
+
+        wrapper.clear = functools.partial(clear, name)
+        return wrapper
+    return decorator
+
+def clear(name=None):
+    global _total_bytes
+    with _lock:
+        for key in [k for k in _entries if name is None or k[0] == name]:
+            _total_bytes -= _entries.pop(key)['size']
+
+def cache_stats():
+    with _lock:
+        sizes = defaultdict(int)
+        for (name, *_), entry in _entries.items():
+            sizes[name] += entry['size']
+        rows = [{'funcao': name, 'mb': sizes[name] / 2 ** 20, **stats} for name, stats in _stats.items()]
+        return pd.DataFrame(rows), _total_bytes
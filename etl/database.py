@@ -1,6 +1,10 @@
 import os
-import streamlit as st 
-from sqlalchemy import create_engine
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+import streamlit as st
+from sqlalchemy import create_engine, event
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,7 +17,84 @@ def get_db_url():
 
 DB_URL = get_db_url()
 
+# Origem dos dados do dashboard: postgres (padrão) ou duckdb (snapshot local, python -m etl.duck snapshot)
+BACKEND = os.getenv("OLIST_BACKEND", "postgres").lower()
+
+# Configuração do pool compartilhado pelo processo (todas as sessões do Streamlit)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Desligado por padrão (0). Ligado, vai por SET em cada conexão nova, e não como parâmetro de
+# inicialização (options), que poolers em modo transaction (pgbouncer, Supabase :6543) rejeitam
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+_stats_lock = threading.Lock()
+_stats = {'connects': 0, 'checkouts': 0, 'wait_total': 0.0, 'wait_max': 0.0}
+_connect_times = deque(maxlen=10_000)
+
+def _on_connect(dbapi_connection, connection_record):
+    with _stats_lock:
+        _stats['connects'] += 1
+        _connect_times.append(time.time())
+
+def _set_statement_timeout(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET statement_timeout = {STATEMENT_TIMEOUT_MS}")
+    cursor.close()
+    # Fora de uma transação aberta pelo SQLAlchemy: confirma o SET para o rollback do pool não desfazê-lo
+    dbapi_connection.commit()
+
+def _record_wait(seconds):
+    with _stats_lock:
+        _stats['checkouts'] += 1
+        _stats['wait_total'] += seconds
+        _stats['wait_max'] = max(_stats['wait_max'], seconds)
+
+@st.cache_resource
 def get_db_engine():
     if not DB_URL:
         return None
-    return create_engine(DB_URL)
+
+    engine = create_engine(
+        DB_URL,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING
+    )
+    event.listen(engine, 'connect', _on_connect)
+    if STATEMENT_TIMEOUT_MS > 0 and engine.dialect.name == 'postgresql':
+        event.listen(engine, 'connect', _set_statement_timeout)
+    return engine
+
+@contextmanager
+def db_connection():
+    engine = get_db_engine()
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        _record_wait(time.perf_counter() - start)
+        yield conn
+
+def get_pool_metrics(window=60):
+    engine = get_db_engine()
+    if not engine: return {}
+
+    pool = engine.pool
+    now = time.time()
+    with _stats_lock:
+        recent = sum(1 for t in _connect_times if now - t <= window)
+        checkouts = _stats['checkouts']
+        return {
+            'pool_size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'connects_total': _stats['connects'],
+            'connects_per_sec': recent / window,
+            'checkouts': checkouts,
+            'wait_avg_ms': _stats['wait_total'] / checkouts * 1000 if checkouts else 0.0,
+            'wait_max_ms': _stats['wait_max'] * 1000
+        }
@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import uuid
+import pandas as pd
+import pyarrow as pa
+from .utils import normalize_series
+from .profiler import span, record_frame
+from .aggregations import histogram_layout, histogram_frame, histogram_bins
+
+# Backend analítico embarcado: snapshot colunar local (arquivo DuckDB) da vw_analise_vendas
+# e das tabelas base. Período, estados e categoria viram predicados SQL e as agregações
+# rodam vetorizadas no DuckDB, sem carregar a view inteira em pandas.
+DUCKDB_PATH = os.getenv('DUCKDB_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'olist.duckdb'))
+
+# Tabelas copiadas do PostgreSQL. A view vai ordenada pela data da compra: os zone maps
+# do DuckDB descartam blocos inteiros fora do período filtrado.
+SNAPSHOT_TABLES = {
+    'vw_analise_vendas': "SELECT * FROM vw_analise_vendas ORDER BY order_purchase_timestamp",
+    'orders': "SELECT * FROM orders",
+    'order_items': "SELECT * FROM order_items",
+    'products': "SELECT * FROM products",
+    'customers': "SELECT * FROM customers",
+    'sellers': "SELECT * FROM sellers",
+    'payments': "SELECT * FROM payments",
+    'geo_cep': "SELECT * FROM geo_cep"
+}
+
+# Geradas pelo pipeline só quando a fonte existe (geo_cep depende da geolocation): ausentes, ficam de fora
+OPTIONAL_TABLES = {'geo_cep'}
+
+# Mesmas definições de database/pipelines/rollups.py, restritas ao recorte filtrado
+SALES_ROLLUP_SQL = """
+    SELECT order_purchase_timestamp::date AS dia,
+           estado_cliente,
+           product_category_name,
+           SUM(valor_venda) AS valor_venda,
+           SUM(valor_frete) AS valor_frete,
+           COUNT(*) AS qtd_itens,
+           COUNT(*) FILTER (WHERE dias_atraso > 0) AS qtd_atrasos,
+           COALESCE(SUM(dias_atraso) FILTER (WHERE dias_atraso > 0), 0)::BIGINT AS soma_dias_atraso
+    FROM vw_analise_vendas
+    WHERE {where}
+    GROUP BY 1, 2, 3
+"""
+
+ORDERS_ROLLUP_SQL = """
+    SELECT order_purchase_timestamp::date AS dia,
+           estado_cliente,
+           COUNT(DISTINCT order_id) AS qtd_pedidos
+    FROM vw_analise_vendas
+    WHERE {where}
+    GROUP BY 1, 2
+"""
+
+CATEGORY_ORDERS_SQL = """
+    SELECT product_category_name,
+           COUNT(DISTINCT order_id) AS qtd_pedidos
+    FROM vw_analise_vendas
+    WHERE {where} AND product_category_name IS NOT NULL
+    GROUP BY 1
+"""
+
+# Histograma de dias_atraso em três consultas pequenas: extremos, contagem perto das bordas
+# (só para valores fracionários) e quantidade por bin, com a regra do aggregations.histogram_layout
+DELAY_STATS_SQL = """
+    SELECT MIN(dias_atraso) AS vmin, MAX(dias_atraso) AS vmax, COUNT(dias_atraso) AS n,
+           COALESCE(BOOL_AND(dias_atraso = FLOOR(dias_atraso)), TRUE) AS inteiro
+    FROM vw_analise_vendas
+    WHERE {where}
+"""
+
+# Mesma conta do aggregations._near_edge, com o resto da divisão sempre positivo como no Python
+DELAY_EDGES_SQL = """
+    SELECT COUNT(*) FILTER (WHERE ((1 + (dias_atraso - ?) * 100 / ?) % 100 + 100) % 100 < 2) AS borda,
+           COUNT(*) FILTER (WHERE ((1 + (dias_atraso + ? - ?) * 100 / ?) % 100 + 100) % 100 < 2) AS meio
+    FROM vw_analise_vendas
+    WHERE {where}
+"""
+
+DELAY_BINS_SQL = """
+    SELECT FLOOR((dias_atraso - ?) / ?)::BIGINT AS bin, COUNT(*) AS qtd
+    FROM vw_analise_vendas
+    WHERE {where} AND dias_atraso IS NOT NULL
+    GROUP BY 1
+"""
+
+def _where(date_range, states=None, category=None):
+    # [início do primeiro dia, início do dia seguinte ao último), como no FilterEngine
+    start = pd.Timestamp(date_range[0])
+    end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+    clauses = ["order_purchase_timestamp >= ?", "order_purchase_timestamp < ?"]
+    params = [start.to_pydatetime(), end.to_pydatetime()]
+
+    if states:
+        clauses.append(f"estado_cliente IN ({', '.join('?' * len(states))})")
+        params.extend(states)
+    if category is not None:
+        clauses.append("product_category_name = ?")
+        params.append(category)
+    return ' AND '.join(clauses), params
+
+# Mesma interface do FilterEngine (min_date, max_date, states, version, filter),
+# mais as consultas agregadas que substituem as passadas em pandas
+class DuckBackend:
+    def __init__(self, path=None):
+        import duckdb
+
+        self.path = path or DUCKDB_PATH
+        self.con = duckdb.connect(self.path, read_only=True)
+        self.version = self.query("SELECT versao FROM snapshot_info", name='snapshot_info')['versao'].iloc[0]
+
+        bounds = self.query(
+            "SELECT MIN(order_purchase_timestamp) AS lo, MAX(order_purchase_timestamp) AS hi FROM vw_analise_vendas",
+            name='limites'
+        )
+        self.min_date = pd.Timestamp(bounds['lo'].iloc[0])
+        self.max_date = pd.Timestamp(bounds['hi'].iloc[0])
+        self.states = self.query(
+            "SELECT DISTINCT estado_cliente FROM vw_analise_vendas WHERE estado_cliente IS NOT NULL ORDER BY 1",
+            name='estados'
+        )['estado_cliente'].tolist()
+
+    # Um cursor por consulta: o Streamlit roda cada sessão numa thread própria
+    def query(self, sql, params=None, name='duckdb'):
+        with span('consulta', name, via='duckdb') as record:
+            with self.con.cursor() as cur:
+                df = cur.execute(sql, params or []).df()
+            record_frame(record, df)
+        return df
+
+    def filter(self, date_range, states=None, columns=None):
+        where, params = _where(date_range, states)
+        select = ', '.join(columns) if columns else '*'
+        return self.query(
+            f"SELECT {select} FROM vw_analise_vendas WHERE {where} ORDER BY order_purchase_timestamp",
+            params, name='vw_analise_vendas'
+        )
+
+    def sales_rollup(self, date_range, states=None):
+        where, params = _where(date_range, states)
+        return self.query(SALES_ROLLUP_SQL.format(where=where), params, name='rollup_vendas')
+
+    def orders_rollup(self, date_range, states=None):
+        where, params = _where(date_range, states)
+        return self.query(ORDERS_ROLLUP_SQL.format(where=where), params, name='rollup_pedidos')
+
+    def category_orders(self, date_range, states=None):
+        where, params = _where(date_range, states)
+        df = self.query(CATEGORY_ORDERS_SQL.format(where=where), params, name='pedidos_categoria')
+        return df.set_index('product_category_name')['qtd_pedidos']
+
+    def delay_histogram(self, date_range, states=None, nbins=50):
+        where, params = _where(date_range, states)
+        stats = self.query(DELAY_STATS_SQL.format(where=where), params, name='atrasos_limites').iloc[0]
+        if not stats['n']:
+            return histogram_bins([])
+
+        def edge_counts(start, size):
+            edges = self.query(DELAY_EDGES_SQL.format(where=where), [start, size, size / 2, start, size] + params, name='atrasos_bordas')
+            return edges['borda'].iloc[0], edges['meio'].iloc[0]
+
+        start, size, count = histogram_layout(
+            float(stats['vmin']), float(stats['vmax']), int(stats['n']), bool(stats['inteiro']), edge_counts, nbins
+        )
+        bins = self.query(DELAY_BINS_SQL.format(where=where), [start, size] + params, name='atrasos_bins')
+        return histogram_frame(start, size, count, bins['bin'], bins['qtd'])
+
+    def city_sales(self, date_range, states, category):
+        where, params = _where(date_range, states, category)
+        return self.query(
+            f"SELECT cidade_norm, SUM(valor_venda) AS valor_venda FROM vw_analise_vendas WHERE {where} GROUP BY 1",
+            params, name='vendas_cidade'
+        )
+
+# cidade_norm sai pronta no snapshot, com a mesma normalização do caminho pandas
+def _with_city_norm(table):
+    cidades = normalize_series(table.column('cidade_cliente').to_pandas())
+    return table.append_column('cidade_norm', pa.array(cidades.astype(object), type=pa.string()))
+
+def export_snapshot(path=None):
+    import duckdb
+    from .database import db_connection
+    from .fetch import read_table, rollback
+
+    path = path or DUCKDB_PATH
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    con = duckdb.connect(tmp)
+    try:
+        with db_connection() as conn:
+            for name, query in SNAPSHOT_TABLES.items():
+                start = time.perf_counter()
+                try:
+                    table = read_table(query, conn)
+                except Exception as e:
+                    if name not in OPTIONAL_TABLES: raise
+                    rollback(conn)
+                    print(f"⚠️ {name} não exportada: {str(e).strip().splitlines()[0]}")
+                    continue
+                if name == 'vw_analise_vendas':
+                    table = _with_city_norm(table)
+                con.register('origem', table)
+                con.execute(f"CREATE TABLE {name} AS SELECT * FROM origem")
+                con.unregister('origem')
+                print(f"🦆 {name}: {table.num_rows:,} linhas em {time.perf_counter() - start:.1f}s")
+
+        con.execute("CREATE TABLE snapshot_info AS SELECT ? AS versao, now() AS criado_em", [uuid.uuid4().hex])
+    finally:
+        con.close()
+
+    # Troca atômica: sessões abertas continuam no arquivo antigo até reabrir o backend
+    os.replace(tmp, path)
+    return path
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'snapshot':
+        print("Uso: python -m etl.duck snapshot [arquivo.duckdb]")
+        sys.exit(1)
+
+    out = export_snapshot(sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"✅ Snapshot salvo em {out} ({os.path.getsize(out) / 2 ** 20:.1f} MB)")
@@ -0,0 +1,104 @@
+import io
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# Leitura colunar: COPY (query) TO STDOUT em CSV, decodificado pelo pyarrow em C (sem objeto Python
+# por célula). Qualquer tipo não mapeado, driver sem COPY ou outro banco volta para o pd.read_sql.
+ARROW_FETCH = os.getenv("DB_ARROW_FETCH", "true").lower() in ("1", "true", "yes")
+
+# OID do PostgreSQL -> tipo Arrow. Inteiros viram int64 e numeric vira float64, como no read_sql
+PG_ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(), 21: pa.int64(), 23: pa.int64(),
+    700: pa.float64(), 701: pa.float64(), 1700: pa.float64(),
+    25: pa.string(), 1042: pa.string(), 1043: pa.string(), 2950: pa.string(),
+    1082: pa.date32(),
+    1114: pa.timestamp('us'),
+    1184: pa.timestamp('us', tz='UTC')
+}
+
+def _arrow_schema(cur, query):
+    cur.execute(f"SELECT * FROM ({query}) AS q LIMIT 0")
+    fields = []
+    for column in cur.description:
+        if column.type_code not in PG_ARROW_TYPES:
+            raise TypeError(f"Tipo sem mapeamento Arrow: OID {column.type_code} ({column.name})")
+        fields.append(pa.field(column.name, PG_ARROW_TYPES[column.type_code]))
+    return pa.schema(fields)
+
+def fetch_arrow(query, conn):
+    query = query.strip().rstrip(';')
+    cur = conn.connection.driver_connection.cursor()
+    try:
+        # Formato de data/hora fixo só nesta transação, independente da configuração do servidor
+        cur.execute("SET LOCAL DateStyle = 'ISO, YMD'; SET LOCAL TimeZone = 'UTC'")
+        schema = _arrow_schema(cur, query)
+        buffer = io.BytesIO()
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", buffer)
+    finally:
+        cur.close()
+
+    buffer.seek(0)
+    return pa_csv.read_csv(
+        buffer,
+        read_options=pa_csv.ReadOptions(column_names=schema.names),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        # No CSV do COPY, NULL é o campo vazio sem aspas; string vazia vem como ""
+        convert_options=pa_csv.ConvertOptions(
+            column_types=schema, strings_can_be_null=True, quoted_strings_can_be_null=False,
+            true_values=['t'], false_values=['f']
+        )
+    )
+
+def arrow_to_pandas(table):
+    return table.to_pandas(date_as_object=False)
+
+def arrow_available(conn):
+    return ARROW_FETCH and conn.dialect.name == 'postgresql' and conn.dialect.driver == 'psycopg2'
+
+# Transação abortada pelo COPY precisa ser desfeita antes do fallback. O COPY roda direto no
+# cursor do driver, então o rollback também: sem transação aberta no SQLAlchemy, conn.rollback() não faz nada
+def rollback(conn):
+    conn.connection.rollback()
+
+# Retorna (DataFrame, caminho usado)
+def read_frame(query, conn):
+    if arrow_available(conn):
+        try:
+            return arrow_to_pandas(fetch_arrow(query, conn)), 'arrow'
+        except Exception:
+            rollback(conn)
+    return pd.read_sql(query, conn), 'read_sql'
+
+# Mesma leitura, mantendo o resultado como tabela Arrow (ex.: exportação de snapshots)
+def read_table(query, conn):
+    if arrow_available(conn):
+        try:
+            return fetch_arrow(query, conn)
+        except Exception:
+            rollback(conn)
+    return pa.Table.from_pandas(pd.read_sql(query, conn), preserve_index=False)
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from .database import db_connection
+
+    query = sys.argv[1] if len(sys.argv) > 1 else "SELECT * FROM vw_analise_vendas"
+    with db_connection() as conn:
+        start = time.perf_counter()
+        df_sql = pd.read_sql(query, conn)
+        sql_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df_arrow, via = read_frame(query, conn)
+        arrow_time = time.perf_counter() - start
+
+    print(f"{len(df_sql):,} linhas")
+    print(f"pd.read_sql: {sql_time * 1000:10.1f} ms")
+    print(f"{via:11s}: {arrow_time * 1000:10.1f} ms")
+    for col in df_sql.columns:
+        if df_sql[col].dtype != df_arrow[col].dtype:
+            print(f"  {col}: {df_sql[col].dtype} -> {df_arrow[col].dtype}")
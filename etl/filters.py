@@ -0,0 +1,58 @@
+import uuid
+import numpy as np
+import pandas as pd
+
+# Índices construídos uma única vez por dataset: os dados ficam ordenados pela data
+# da compra (período vira fatia por busca binária) e cada estado guarda as posições
+# das suas linhas, também em ordem cronológica
+class FilterEngine:
+    def __init__(self, df, time_col='order_purchase_timestamp', state_col='estado_cliente'):
+        # Já ordenado (ex.: dataset compartilhado em mmap): usa as colunas como estão, sem cópia
+        if not df[time_col].is_monotonic_increasing:
+            df = df.sort_values(time_col, kind='stable')
+        self.df = df.reset_index(drop=True)
+        self.version = uuid.uuid4().hex
+
+        self._times = self.df[time_col].to_numpy()
+        self.min_date = self.df[time_col].min()
+        self.max_date = self.df[time_col].max()
+
+        codes, uniques = pd.factorize(self.df[state_col])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self._state_positions = {
+            state: order[bounds[i]:bounds[i + 1]] for i, state in enumerate(uniques)
+        }
+        self.states = sorted(self._state_positions)
+
+    def _bound(self, day):
+        return np.datetime64(pd.Timestamp(day)).astype(self._times.dtype)
+
+    def date_slice(self, start, end):
+        # [início do primeiro dia, início do dia seguinte ao último)
+        lo = np.searchsorted(self._times, self._bound(start), side='left')
+        hi = np.searchsorted(self._times, self._bound(pd.Timestamp(end) + pd.Timedelta(days=1)), side='left')
+        return lo, hi
+
+    def positions(self, date_range, states=None):
+        lo, hi = self.date_slice(*date_range)
+        if not states:
+            return slice(lo, hi)
+
+        parts = []
+        for state in states:
+            pos = self._state_positions.get(state)
+            if pos is not None:
+                parts.append(pos[np.searchsorted(pos, lo):np.searchsorted(pos, hi)])
+        if not parts:
+            return np.array([], dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+    def filter(self, date_range, states=None, columns=None):
+        data = self.df if columns is None else self.df[columns]
+        rows = self.positions(date_range, states)
+
+        # Só período: fatia contígua do DataFrame ordenado, sem copiar as colunas
+        if isinstance(rows, slice):
+            return data.iloc[rows]
+        return data.take(rows)
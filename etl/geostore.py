@@ -0,0 +1,139 @@
+import os
+import sys
+import gzip
+import json
+from functools import lru_cache
+from urllib.request import urlopen
+from .utils import normalize_cached, ESTADOS_IBGE
+from .simplify import simplify_levels
+
+GEO_DIR = os.getenv('GEO_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'geo'))
+GEO_CACHE_SIZE = int(os.getenv('GEO_CACHE_SIZE', 8))
+
+# Fontes originais: malhas municipais do IBGE (tbrugz/geodata-br) e a camada de estados
+MUNICIPIOS_URL = "https://raw.githubusercontent.com/tbrugz/geodata-br/master/geojson/geojs-{ibge_code}-mun.json"
+ESTADOS_URL = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+MUNICIPIOS_FILE = "geojs-{ibge_code}-mun.json"
+ESTADOS_FILE = "brazil-states.geojson"
+
+# Níveis gerados na importação: tolerância do Douglas-Peucker (graus; 0.001 ≈ 110 m)
+# e casas decimais das coordenadas. 'original' guarda a malha sem simplificação.
+DETAIL_LEVELS = {
+    'alto': {'tolerance': 0.0005, 'digits': 4},
+    'medio': {'tolerance': 0.002, 'digits': 3},
+    'baixo': {'tolerance': 0.008, 'digits': 3}
+}
+DEFAULT_LEVEL = 'medio'
+
+def _store_path(name, geo_dir=None):
+    return os.path.join(geo_dir or GEO_DIR, f"{name}.json.gz")
+
+def _write(geojson, name, geo_dir):
+    path = _store_path(name, geo_dir)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=9) as f:
+        json.dump(geojson, f, separators=(',', ':'), ensure_ascii=False)
+    return os.path.getsize(path)
+
+def _read(name):
+    path = _store_path(name)
+    if not os.path.exists(path): return None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_levels(geojson, name, geo_dir):
+    sizes = {'original': _write(geojson, f"{name}-original", geo_dir)}
+    for level, features in simplify_levels(geojson['features'], DETAIL_LEVELS).items():
+        sizes[level] = _write({'type': 'FeatureCollection', 'features': features}, f"{name}-{level}", geo_dir)
+    return sizes
+
+def _format_sizes(sizes):
+    return ', '.join(f"{level} {size / 1024:.0f} KB" for level, size in sizes.items())
+
+# Só as propriedades usadas pelos mapas; id_norm casa com a cidade_norm dos dados de vendas
+def prepare_municipalities(geojson, uf):
+    features = []
+    for feature in geojson['features']:
+        props = feature['properties']
+        features.append({
+            'type': 'Feature',
+            'properties': {
+                'id': str(props['id']),
+                'name': props['name'],
+                'id_norm': normalize_cached(props['name']),
+                'uf': uf
+            },
+            'geometry': feature['geometry']
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+def prepare_states(geojson):
+    features = []
+    for feature in geojson['features']:
+        sigla = feature['properties']['sigla']
+        features.append({
+            'type': 'Feature',
+            'properties': {
+                'sigla': sigla,
+                'name': feature['properties'].get('name', sigla),
+                'codigo_ibge': ESTADOS_IBGE.get(sigla)
+            },
+            'geometry': feature['geometry']
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+def import_geojson(source_dir, geo_dir=None):
+    geo_dir = geo_dir or GEO_DIR
+    os.makedirs(geo_dir, exist_ok=True)
+    manifest = {}
+
+    for uf, ibge_code in sorted(ESTADOS_IBGE.items()):
+        path = os.path.join(source_dir, MUNICIPIOS_FILE.format(ibge_code=ibge_code))
+        if not os.path.exists(path):
+            print(f"⚠️ {uf}: {os.path.basename(path)} não encontrado")
+            continue
+        with open(path, encoding='utf-8') as f:
+            geojson = prepare_municipalities(json.load(f), uf)
+        sizes = _write_levels(geojson, f"mun-{uf}", geo_dir)
+        manifest[uf] = {'codigo_ibge': ibge_code, 'features': len(geojson['features']), 'bytes': sizes}
+        print(f"✅ {uf}: {len(geojson['features'])} municípios ({_format_sizes(sizes)})")
+
+    path = os.path.join(source_dir, ESTADOS_FILE)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            geojson = prepare_states(json.load(f))
+        sizes = _write_levels(geojson, 'estados', geo_dir)
+        manifest['BR'] = {'features': len(geojson['features']), 'bytes': sizes}
+        print(f"✅ Estados: {len(geojson['features'])} UFs ({_format_sizes(sizes)})")
+    else:
+        print(f"⚠️ {ESTADOS_FILE} não encontrado")
+
+    with open(os.path.join(geo_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    load_municipalities.cache_clear()
+    load_states.cache_clear()
+    return manifest
+
+# Baixa os arquivos originais numa máquina com internet, para depois importar no host sem acesso
+def download_geojson(target_dir):
+    os.makedirs(target_dir, exist_ok=True)
+    sources = [(MUNICIPIOS_URL.format(ibge_code=code), MUNICIPIOS_FILE.format(ibge_code=code)) for code in ESTADOS_IBGE.values()]
+    sources.append((ESTADOS_URL, ESTADOS_FILE))
+    for url, name in sources:
+        with urlopen(url) as response, open(os.path.join(target_dir, name), 'wb') as f:
+            f.write(response.read())
+        print(f"⬇️ {name}")
+
+@lru_cache(maxsize=GEO_CACHE_SIZE)
+def load_municipalities(uf, level=DEFAULT_LEVEL):
+    return _read(f"mun-{uf}-{level}")
+
+@lru_cache(maxsize=len(DETAIL_LEVELS) + 1)
+def load_states(level=DEFAULT_LEVEL):
+    return _read(f"estados-{level}")
+
+if __name__ == "__main__":
+    commands = {'import': import_geojson, 'download': download_geojson}
+    if len(sys.argv) != 3 or sys.argv[1] not in commands:
+        print("Uso: python -m etl.geostore [import|download] <pasta>")
+        sys.exit(1)
+    commands[sys.argv[1]](sys.argv[2])
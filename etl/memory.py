@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Texto com até 50% de valores distintos vira categoria; acima disso (IDs) vira string pyarrow
+CATEGORY_MAX_RATIO = 0.5
+# Inteiros até 2^24 são representados exatamente em float32
+FLOAT32_EXACT_LIMIT = 2 ** 24
+# Valores monetários ficam sempre em float64, mesmo quando todos são inteiros (em float32 as
+# somas de receita perdem precisão)
+FLOAT64_COLUMNS = {'valor_venda', 'valor_frete'}
+
+def _is_text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    if pd.api.types.is_string_dtype(series.dtype) or pd.api.types.is_object_dtype(series.dtype):
+        return pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty')
+    return False
+
+def _is_integral(series):
+    values = series.dropna().to_numpy()
+    return bool(np.all(np.mod(values, 1) == 0) and np.all(np.abs(values) < FLOAT32_EXACT_LIMIT))
+
+def optimize_dataframe(df, category_max_ratio=CATEGORY_MAX_RATIO):
+    optimized = {}
+    for col in df.columns:
+        series = df[col]
+        dtype = series.dtype
+
+        if _is_text(series):
+            if len(series) and series.nunique(dropna=True) / len(series) <= category_max_ratio:
+                optimized[col] = series.astype('category')
+            else:
+                optimized[col] = series.astype('string[pyarrow]')
+        elif pd.api.types.is_bool_dtype(dtype):
+            optimized[col] = series
+        elif pd.api.types.is_integer_dtype(dtype):
+            optimized[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(dtype) and col not in FLOAT64_COLUMNS and _is_integral(series):
+            # Contagens/dias com NaN (ex.: dias_atraso)
+            optimized[col] = series.astype('float32')
+        else:
+            optimized[col] = series
+    return pd.DataFrame(optimized, index=df.index)
+
+def memory_report(before, after):
+    report = pd.DataFrame({
+        'dtype_antes': before.dtypes.astype(str),
+        'bytes_antes': before.memory_usage(deep=True, index=False),
+        'dtype_depois': after.dtypes.astype(str),
+        'bytes_depois': after.memory_usage(deep=True, index=False)
+    })
+    report.loc['TOTAL'] = ['', report['bytes_antes'].sum(), '', report['bytes_depois'].sum()]
+    report['reducao_%'] = (1 - report['bytes_depois'] / report['bytes_antes']) * 100
+    return report
+
+if __name__ == "__main__":
+    from .repository import load_sales_data
+
+    before = load_sales_data()
+    after = optimize_dataframe(before)
+    pd.set_option('display.width', 160)
+    pd.set_option('display.max_columns', None)
+    print(memory_report(before, after).round(1))
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+
+# Instrumentação opcional por rerun (OLIST_PROFILE=1 ou ?debug=1 na URL).
+# Desligada, cada ponto instrumentado custa só a leitura de um atributo thread-local.
+PROFILE_ENV = os.getenv('OLIST_PROFILE', '').lower() in ('1', 'true', 'yes')
+PROFILE_FILE = os.getenv('OLIST_PROFILE_FILE')
+
+_local = threading.local()
+
+def current():
+    return getattr(_local, 'trace', None)
+
+def start_rerun():
+    _local.trace = {
+        'rerun_id': uuid.uuid4().hex[:12],
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'spans': [],
+        '_inicio': time.perf_counter(),
+        '_profundidade': 0
+    }
+    return _local.trace
+
+# Descarta o perfil de um rerun interrompido (st.stop, novo rerun) antes de desligar
+def discard():
+    _local.trace = None
+
+def finish_rerun():
+    trace = current()
+    _local.trace = None
+    if trace is None: return None
+
+    trace['total_ms'] = (time.perf_counter() - trace.pop('_inicio')) * 1000
+    trace.pop('_profundidade')
+    if PROFILE_FILE:
+        with open(PROFILE_FILE, 'a', encoding='utf-8') as f:
+            f.write(to_jsonl([trace]))
+    return trace
+
+@contextmanager
+def span(tipo, nome, **attrs):
+    trace = current()
+    if trace is None:
+        yield None
+        return
+
+    record = {'tipo': tipo, 'nome': nome, 'profundidade': trace['_profundidade'], **attrs}
+    trace['spans'].append(record)
+    trace['_profundidade'] += 1
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['inicio_ms'] = (start - trace['_inicio']) * 1000
+        record['duracao_ms'] = (time.perf_counter() - start) * 1000
+        trace['_profundidade'] -= 1
+
+def record_frame(record, df):
+    if record is None: return
+    record['linhas'] = len(df)
+    record['bytes'] = int(df.memory_usage(deep=True).sum())
+
+# Envolve um decorator de cache do Streamlit (st.cache_data / st.cache_resource):
+# o corpo só executa em cache miss, então marcá-lo basta para distinguir hit de miss
+def traced_cache(cache_decorator):
+    def decorator(func):
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            trace = current()
+            if trace is not None:
+                trace['_miss'] = True
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(body)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = current()
+            if trace is None:
+                return cached(*args, **kwargs)
+
+            outer_miss = trace.pop('_miss', None)
+            with span('cache', func.__name__) as record:
+                result = cached(*args, **kwargs)
+                record['cache'] = 'miss' if trace.pop('_miss', False) else 'hit'
+            if outer_miss:
+                trace['_miss'] = outer_miss
+            return result
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+# Tempo de montagem, tamanho do JSON e tempo de serialização de cada figura
+def traced_figure(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if current() is None:
+            return func(*args, **kwargs)
+
+        with span('figura', func.__name__) as record:
+            fig = func(*args, **kwargs)
+        if fig is not None:
+            start = time.perf_counter()
+            record['json_bytes'] = len(fig.to_json().encode('utf-8'))
+            record['serializacao_ms'] = (time.perf_counter() - start) * 1000
+        return fig
+    return wrapper
+
+def to_jsonl(traces):
+    return ''.join(json.dumps(trace, ensure_ascii=False) + '\n' for trace in traces)
@@ -1,71 +1,479 @@
+import os
 import pandas as pd
 import streamlit as st
 from urllib.request import urlopen
 import json
-from .database import get_db_engine, DB_URL
-from .utils import normalize_text, ESTADOS_IBGE
+import time
+import uuid
+from .database import get_db_engine, db_connection, DB_URL, BACKEND
+from .utils import normalize_series, ESTADOS_IBGE
+from .aggregations import (
+    filter_rollup, compute_kpis, build_sales_rollup, build_orders_rollup, build_chart_tables,
+    build_category_orders, histogram_bins
+)
+from .memory import optimize_dataframe
+from .filters import FilterEngine
+from .profiler import traced_cache, span, record_frame
+from .cache import swr_cache, has_data
+from .fetch import read_frame
+from .duck import DuckBackend
+from .shared import SharedDataset, SHARED_DIR
+from .summary import build_summary, save_summary
+from .sketch import count_distinct, EXACT_DISTINCT, RELATIVE_ERROR
+from .geostore import (
+    load_municipalities, load_states, prepare_municipalities, MUNICIPIOS_URL, ESTADOS_URL, DEFAULT_LEVEL
+)
 
-@st.cache_data(ttl=3600)
-def get_data():
-    engine = get_db_engine()
-    if not engine: return pd.DataFrame()
-    
+def prepare_sales_data(df):
+    df['order_purchase_timestamp'] = pd.to_datetime(df['order_purchase_timestamp'])
+    df['order_delivered_customer_date'] = pd.to_datetime(df['order_delivered_customer_date'])
+    df['cidade_norm'] = normalize_series(df['cidade_cliente'])
+    return df
+
+# Leitura colunar via Arrow quando disponível (etl/fetch.py), com tempo, linhas, bytes
+# e caminho usado de cada consulta no perfil do rerun
+def read_sql(query, conn, name):
+    with span('consulta', name) as record:
+        df, via = read_frame(query, conn)
+        record_frame(record, df)
+        if record is not None:
+            record['via'] = via
+    return df
+
+def load_sales_data():
     query = "SELECT * FROM vw_analise_vendas;"
+    with db_connection() as conn:
+        df = read_sql(query, conn, 'vw_analise_vendas')
+    return prepare_sales_data(df)
+
+# Já ordenado pela data da compra: o FilterEngine usa essa ordem sem copiar o DataFrame
+def load_optimized_sales_data():
+    df = optimize_dataframe(load_sales_data())
+    return df.sort_values('order_purchase_timestamp', kind='stable').reset_index(drop=True)
+
+# Versão da carga: gravada pelo pipeline em etl_load_version ao final de cada carga (view e rollups
+# já atualizados). Entra na chave de todos os caches derivados do banco, então dataset, rollups e
+# tabelas dos gráficos trocam de versão juntos. Sem a tabela (banco não carregado pelo pipeline),
+# a versão é vazia e cada cache vence só pelo próprio TTL.
+LOAD_VERSION_TTL = int(os.getenv('OLIST_LOAD_VERSION_TTL', 60))
+
+def read_load_version():
     try:
-        df = pd.read_sql(query, engine)
-        df['order_purchase_timestamp'] = pd.to_datetime(df['order_purchase_timestamp'])
-        df['order_delivered_customer_date'] = pd.to_datetime(df['order_delivered_customer_date'])
-        df['cidade_norm'] = df['cidade_cliente'].apply(normalize_text)
+        with db_connection() as conn:
+            df = read_sql("SELECT version FROM etl_load_version;", conn, 'etl_load_version')
+        return str(df['version'].iloc[0]) if len(df) else ''
+    except Exception:
+        return ''
+
+# Relida a cada LOAD_VERSION_TTL segundos em segundo plano (a consulta não bloqueia o rerun)
+@traced_cache(swr_cache(ttl=LOAD_VERSION_TTL, valid=has_data))
+def get_load_version():
+    if BACKEND == 'duckdb':
+        backend = get_duck_backend()
+        return backend.version if backend else ''
+    if not get_db_engine(): return ''
+    return read_load_version()
+
+# Com OLIST_SHARED_DIR, o dataset é publicado uma vez por máquina em Arrow IPC e aberto via mmap
+# por todos os processos (etl/shared.py); sem ela, cada processo mantém a sua cópia em cache
+SHARED_SALES = SharedDataset('vw_analise_vendas', load_optimized_sales_data) if SHARED_DIR else None
+
+def get_data(version):
+    if SHARED_SALES is None:
+        return get_local_data(version)
+
+    with span('cache', 'dataset_compartilhado') as record:
+        try:
+            df = SHARED_SALES.get(version)
+        except Exception as e:
+            print(f"⚠️ Erro ao abrir o dataset compartilhado: {e}")
+            df = pd.DataFrame()
+        record_frame(record, df)
+    return df
+
+# Cargas do banco passam pelo cache stale-while-revalidate (etl/cache.py): ao vencer o TTL,
+# as sessões continuam recebendo a versão anterior enquanto um único refresh roda em segundo plano.
+# O objeto em cache é compartilhado (sem cópia por sessão): quem consome não pode alterá-lo.
+# Só a versão atual da carga fica em memória (max_entries=1).
+@traced_cache(swr_cache(ttl=3600, valid=has_data, max_entries=1))
+def get_local_data(version):
+    if not get_db_engine(): return pd.DataFrame()
+    
+    try:
+        df = load_optimized_sales_data()
+        df.attrs['versao'] = uuid.uuid4().hex
         return df
     except Exception as e:
-        st.error(f"Erro ao conectar no banco: {e}")
+        print(f"⚠️ Erro ao conectar no banco: {e}")
+        return pd.DataFrame()
+
+# Compartilhado entre sessões; os índices são montados uma vez por versão carregada do get_data.
+# Carrega as linhas da vw_analise_vendas: só as abas que precisam delas (histograma, mapa de
+# cidades, contagem exata por categoria) e o fallback sem rollups chegam aqui.
+# No backend duckdb o filtro vira predicado SQL sobre o snapshot local.
+def get_filter_engine(version):
+    if BACKEND == 'duckdb':
+        return get_duck_backend()
+
+    df = get_data(version)
+    if df.empty: return None
+    return build_filter_engine(df.attrs['versao'], df)
+
+@traced_cache(st.cache_resource(max_entries=1))
+def build_filter_engine(data_version, _df):
+    return FilterEngine(_df)
+
+@traced_cache(st.cache_resource(ttl=3600))
+def get_duck_backend():
+    try:
+        return DuckBackend()
+    except Exception as e:
+        print(f"⚠️ Erro ao abrir o snapshot DuckDB: {e}")
+        return None
+
+@traced_cache(swr_cache(ttl=3600, valid=has_data, max_entries=1))
+def get_sales_rollup(version):
+    if not get_db_engine(): return pd.DataFrame()
+
+    query = "SELECT * FROM rollup_vendas;"
+    try:
+        with db_connection() as conn:
+            df = read_sql(query, conn, 'rollup_vendas')
+        df['dia'] = pd.to_datetime(df['dia'])
+        return df
+    except Exception:
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
-def get_payment_data():
-    engine = get_db_engine()
-    if not engine: return pd.DataFrame()
+@traced_cache(swr_cache(ttl=3600, valid=has_data, max_entries=1))
+def get_orders_rollup(version):
+    if not get_db_engine(): return pd.DataFrame()
+
+    query = "SELECT * FROM rollup_pedidos;"
+    try:
+        with db_connection() as conn:
+            df = read_sql(query, conn, 'rollup_pedidos')
+        df['dia'] = pd.to_datetime(df['dia'])
+        return df
+    except Exception:
+        return pd.DataFrame()
+
+# Sketches HyperLogLog das order_id (rollup_pedidos_hll, etl/sketch.py) já combinados no banco para
+# o recorte: máximo de cada registrador no total (total = 1) e por categoria (total = 0). O processo
+# recebe no máximo REGISTERS linhas por categoria, qualquer que seja o tamanho da tabela, então
+# nada dela fica em memória entre filtros. None sem a tabela (ou com erro): contagem exata.
+ORDERS_SKETCH_SQL = """
+SELECT product_category_name, registro, MAX(rho) AS rho, GROUPING(product_category_name) AS total
+FROM rollup_pedidos_hll
+WHERE {where}
+GROUP BY GROUPING SETS ((registro), (product_category_name, registro));
+"""
+
+def _sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+@traced_cache(st.cache_data(ttl=3600, max_entries=64))
+def get_orders_sketches(version, date_range, states):
+    if EXACT_DISTINCT or not get_db_engine(): return None
+
+    where = f"dia >= {_sql_literal(pd.Timestamp(date_range[0]).date())} AND dia <= {_sql_literal(pd.Timestamp(date_range[1]).date())}"
+    if states:
+        where += f" AND estado_cliente IN ({', '.join(_sql_literal(s) for s in states)})"
+    try:
+        with db_connection() as conn:
+            return read_sql(ORDERS_SKETCH_SQL.format(where=where), conn, 'rollup_pedidos_hll')
+    except Exception:
+        return None
+
+def get_rollup_sales(version, date_range, states):
+    rollup = get_sales_rollup(version)
+    if rollup.empty: return None
+    return filter_rollup(rollup, date_range, states)
+
+# Pedidos dos cards: estimados pelos sketches (o ticket médio herda o erro) ou somados do
+# rollup_pedidos, exato (OLIST_EXACT_DISTINCT=1 ou sem a tabela de sketches)
+def get_rollup_kpis(version, date_range, states):
+    vendas = get_rollup_sales(version, date_range, states)
+    if vendas is None: return None
+
+    sketches = get_orders_sketches(version, date_range, states)
+    if sketches is not None:
+        return compute_kpis(vendas, count_distinct(sketches[sketches['total'] == 1]), RELATIVE_ERROR)
+
+    pedidos = get_orders_rollup(version)
+    if pedidos.empty: return None
+    return compute_kpis(vendas, filter_rollup(pedidos, date_range, states)['qtd_pedidos'].sum())
+
+# Limites dos filtros (período e estados) para a primeira pintura: saem do rollup_vendas, sem
+# carregar as linhas da vw_analise_vendas; sem rollups (ou no DuckDB), do FilterEngine
+@traced_cache(swr_cache(ttl=3600, valid=has_data, max_entries=1))
+def get_filter_bounds(version):
+    rollup = get_sales_rollup(version) if BACKEND != 'duckdb' else pd.DataFrame()
+    if not rollup.empty:
+        return {
+            'min_date': rollup['dia'].min().date(),
+            'max_date': rollup['dia'].max().date(),
+            'estados': sorted(rollup['estado_cliente'].dropna().unique().tolist())
+        }
+
+    engine = get_filter_engine(version)
+    if engine is None: return None
+    return {'min_date': engine.min_date.date(), 'max_date': engine.max_date.date(), 'estados': list(engine.states)}
+
+# KPIs e tabelas dos gráficos agregados numa única passada por estado de filtro, a partir dos
+# rollups (sem as linhas da view). A versão da carga entra na chave.
+@traced_cache(st.cache_data(ttl=3600, max_entries=64))
+def get_chart_tables(version, date_range, states):
+    if BACKEND == 'duckdb':
+        engine = get_filter_engine(version)
+        with span('agregacao', 'rollups_duckdb'):
+            vendas = engine.sales_rollup(date_range, states)
+            kpis = compute_kpis(vendas, engine.orders_rollup(date_range, states)['qtd_pedidos'].sum())
+    else:
+        vendas = get_rollup_sales(version, date_range, states)
+        kpis = get_rollup_kpis(version, date_range, states)
+
+    # Sem rollups no banco, o mesmo formato é calculado em pandas sobre o recorte filtrado
+    if vendas is None or kpis is None:
+        engine = get_filter_engine(version)
+        with span('agregacao', 'rollups_pandas'):
+            df = engine.filter(date_range, states)
+            vendas = build_sales_rollup(df)
+            kpis = compute_kpis(vendas, build_orders_rollup(df)['qtd_pedidos'].sum())
+
+    with span('agregacao', 'build_chart_tables'):
+        tables = build_chart_tables(vendas)
+    tables['kpis'] = kpis
+    return tables
+
+# Histograma dos dias de atraso (aba de prazos). No DuckDB os bins saem do próprio snapshot,
+# sem trazer os dias_atraso de cada item
+@traced_cache(st.cache_data(ttl=3600, max_entries=64))
+def get_delay_histogram(version, date_range, states):
+    engine = get_filter_engine(version)
+    with span('agregacao', 'histogram_bins'):
+        if BACKEND == 'duckdb':
+            return engine.delay_histogram(date_range, states)
+        return histogram_bins(engine.filter(date_range, states, columns=['dias_atraso'])['dias_atraso'])
+
+# Tabela de categorias com os pedidos distintos de cada uma (aba de produtos) e o erro padrão
+# relativo da contagem. Pedidos não somam a partir do rollup_pedidos (um pedido pode ter várias
+# categorias): saem dos sketches combinados no banco ou da contagem exata sobre as linhas
+# (OLIST_EXACT_DISTINCT=1, sem a tabela de sketches ou no DuckDB, que já filtra as linhas no snapshot)
+@traced_cache(st.cache_data(ttl=3600, max_entries=64))
+def get_category_orders(version, date_range, states):
+    with span('agregacao', 'pedidos_por_categoria'):
+        pedidos, erro = count_category_orders(version, date_range, states)
+    categorias = get_chart_tables(version, date_range, states)['categorias'].join(pedidos, on='product_category_name')
+    return categorias.assign(qtd_pedidos=categorias['qtd_pedidos'].fillna(0).astype('int64')), erro
+
+def count_category_orders(version, date_range, states):
+    if BACKEND == 'duckdb':
+        return get_filter_engine(version).category_orders(date_range, states), 0.0
+
+    sketches = get_orders_sketches(version, date_range, states)
+    if sketches is not None:
+        return count_distinct(sketches[sketches['total'] == 0], by='product_category_name'), RELATIVE_ERROR
+
+    df = get_filter_engine(version).filter(date_range, states, columns=['product_category_name', 'order_id'])
+    return build_category_orders(df), 0.0
+
+# Faturamento por cidade de uma categoria (mapa de uma UF)
+@traced_cache(st.cache_data(ttl=3600, max_entries=64))
+def get_city_sales(version, date_range, states, category):
+    engine = get_filter_engine(version)
+    if BACKEND == 'duckdb':
+        return engine.city_sales(date_range, states, category)
+
+    df = engine.filter(date_range, states, columns=['product_category_name', 'cidade_norm', 'valor_venda'])
+    df = df[df['product_category_name'] == category]
+    return df.groupby('cidade_norm', observed=True)['valor_venda'].sum().reset_index()
+
+def has_data_source():
+    return BACKEND == 'duckdb' or get_db_engine() is not None
+
+# Consultas sobre as tabelas base, no PostgreSQL ou no snapshot DuckDB (o SQL é o mesmo)
+def run_queries(queries, prefix=''):
+    if BACKEND == 'duckdb':
+        backend = get_duck_backend()
+        return {name: backend.query(query, name=prefix + name) for name, query in queries.items()}
+
+    with db_connection() as conn:
+        return {name: read_sql(query, conn, prefix + name) for name, query in queries.items()}
+
+# Tabelas base: também por versão da carga, como os rollups
+@traced_cache(swr_cache(ttl=3600, valid=has_data, max_entries=1))
+def get_payment_data(version):
+    if not has_data_source(): return pd.DataFrame()
     
     query = """
     SELECT payment_type, count(order_id) as qtd_pedidos
     FROM payments GROUP BY payment_type ORDER BY qtd_pedidos DESC;
     """
     try:
-        return pd.read_sql(query, engine)
+        return run_queries({'pagamentos': query})['pagamentos']
     except Exception:
         return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
-def get_logistics_data():
-    engine = get_db_engine()
-    if not engine: return pd.DataFrame()
-    
-    query = """
-    SELECT oi.freight_value, oi.price, p.product_category_name, p.product_weight_g,
-           c.customer_state, s.seller_state
+# Faixas de peso (g) do gráfico de frete, fechadas à direita como no pd.cut
+WEIGHT_BINS = [0, 500, 1000, 2000, 5000, 10000, 30000, 100000]
+WEIGHT_LABELS = ['Até 500g', '500g-1kg', '1kg-2kg', '2kg-5kg', '5kg-10kg', '10kg-30kg', '+30kg']
+
+LOGISTICS_BASE = """
     FROM order_items oi
     JOIN products p ON oi.product_id = p.product_id
     JOIN orders o ON oi.order_id = o.order_id
     JOIN customers c ON o.customer_id = c.customer_id
     JOIN sellers s ON oi.seller_id = s.seller_id
-    WHERE o.order_status = 'delivered' LIMIT 50000;
-    """
+    WHERE o.order_status = 'delivered'
+"""
+
+def _bin_sql(column, bins):
+    cases = " ".join(
+        f"WHEN {column} > {lo} AND {column} <= {hi} THEN {i}"
+        for i, (lo, hi) in enumerate(zip(bins, bins[1:]))
+    )
+    return f"CASE {cases} END"
+
+# Agregações sobre toda a população de itens entregues, calculadas no banco:
+# o resultado tem poucas linhas independente do volume de pedidos
+@traced_cache(swr_cache(ttl=3600, valid=has_data, max_entries=1))
+def get_logistics_data(version):
+    if not has_data_source(): return {}
+
+    queries = {
+        'estados': f"""
+            SELECT c.customer_state, AVG(oi.freight_value) AS freight_value, COUNT(*) AS qtd_itens
+            {LOGISTICS_BASE} AND c.customer_state IS NOT NULL
+            GROUP BY c.customer_state ORDER BY c.customer_state;
+        """,
+        'faixas_peso': f"""
+            SELECT {_bin_sql('p.product_weight_g', WEIGHT_BINS)} AS faixa,
+                   AVG(oi.freight_value) AS freight_value, COUNT(*) AS qtd_itens
+            {LOGISTICS_BASE} AND p.product_weight_g > {WEIGHT_BINS[0]} AND p.product_weight_g <= {WEIGHT_BINS[-1]}
+            GROUP BY faixa ORDER BY faixa;
+        """,
+        'categorias': f"""
+            SELECT p.product_category_name,
+                   AVG(oi.freight_value / NULLIF(oi.price, 0)) * 100 AS frete_relativo,
+                   AVG(oi.freight_value) AS freight_value, COUNT(oi.price) AS qtd_itens
+            {LOGISTICS_BASE} AND p.product_category_name IS NOT NULL
+            GROUP BY p.product_category_name;
+        """
+    }
     try:
-        return pd.read_sql(query, engine)
+        tables = run_queries(queries, prefix='logistica.')
     except Exception:
-        return pd.DataFrame()
+        return {}
 
-@st.cache_data(ttl=3600)
-def get_geojson_state(uf):
-    ibge_code = ESTADOS_IBGE.get(uf)
-    if not ibge_code: return None
-    
-    url = f"https://raw.githubusercontent.com/tbrugz/geodata-br/master/geojson/geojs-{ibge_code}-mun.json"
+    faixas = tables['faixas_peso']
+    faixas['faixa_peso'] = pd.Categorical.from_codes(faixas.pop('faixa').astype(int), categories=WEIGHT_LABELS, ordered=True)
+    tables['faixas_peso'] = faixas[['faixa_peso', 'freight_value', 'qtd_itens']]
+    return tables
+
+# Faixas de distância vendedor -> cliente (km); a primeira inclui o mesmo prefixo de CEP (0 km)
+DISTANCE_BINS = [-1, 100, 300, 600, 1000, 2000, 5000]
+DISTANCE_LABELS = ['Até 100 km', '100-300 km', '300-600 km', '600-1000 km', '1000-2000 km', '+2000 km']
+
+# Distância em linha reta (haversine) entre os centróides de dois prefixos de CEP
+def _haversine_sql(a, b):
+    return f"""2 * 6371 * ASIN(LEAST(1, SQRT(
+        POWER(SIN(RADIANS({b}.lat - {a}.lat) / 2), 2)
+        + COS(RADIANS({a}.lat)) * COS(RADIANS({b}.lat)) * POWER(SIN(RADIANS({b}.lng - {a}.lng) / 2), 2)
+    )))"""
+
+# Consultas sobre o índice de CEP (geo_cep, gerado pelo pipeline a partir da geolocation):
+# ~19k centróides no lugar de ~1M pontos. Sem o índice o resultado é vazio e a seção some.
+@traced_cache(swr_cache(ttl=3600, valid=has_data, max_entries=1))
+def get_geo_data(version):
+    if not has_data_source(): return {}
+
+    queries = {
+        'densidade': """
+            SELECT 'Clientes' AS tipo, g.lat, g.lng, COUNT(*) AS qtd
+            FROM customers c JOIN geo_cep g ON g.zip_code_prefix = c.customer_zip_code_prefix
+            GROUP BY g.zip_code_prefix, g.lat, g.lng
+            UNION ALL
+            SELECT 'Vendedores' AS tipo, g.lat, g.lng, COUNT(*) AS qtd
+            FROM sellers s JOIN geo_cep g ON g.zip_code_prefix = s.seller_zip_code_prefix
+            GROUP BY g.zip_code_prefix, g.lat, g.lng;
+        """,
+        'distancias': f"""
+            SELECT {_bin_sql('distancia_km', DISTANCE_BINS)} AS faixa,
+                   AVG(distancia_km) AS distancia_km, AVG(freight_value) AS freight_value,
+                   AVG(dias_entrega) AS dias_entrega, COUNT(*) AS qtd_itens
+            FROM (
+                SELECT oi.freight_value,
+                       {_haversine_sql('gs', 'gc')} AS distancia_km,
+                       CAST(EXTRACT(EPOCH FROM o.order_delivered_customer_date - o.order_purchase_timestamp) AS DOUBLE PRECISION) / 86400 AS dias_entrega
+                FROM order_items oi
+                JOIN orders o ON oi.order_id = o.order_id
+                JOIN customers c ON o.customer_id = c.customer_id
+                JOIN sellers s ON oi.seller_id = s.seller_id
+                JOIN geo_cep gc ON gc.zip_code_prefix = c.customer_zip_code_prefix
+                JOIN geo_cep gs ON gs.zip_code_prefix = s.seller_zip_code_prefix
+                WHERE o.order_status = 'delivered'
+            ) itens
+            WHERE distancia_km <= {DISTANCE_BINS[-1]}
+            GROUP BY faixa ORDER BY faixa;
+        """
+    }
+    try:
+        tables = run_queries(queries, prefix='geo.')
+    except Exception:
+        return {}
+
+    distancias = tables['distancias']
+    distancias['faixa_distancia'] = pd.Categorical.from_codes(distancias.pop('faixa').astype(int), categories=DISTANCE_LABELS, ordered=True)
+    tables['distancias'] = distancias[['faixa_distancia', 'distancia_km', 'freight_value', 'dias_entrega', 'qtd_itens']]
+    return tables
+
+# Malhas locais (python -m etl.geostore import); sem o store, busca na fonte original
+def get_geojson_state(uf, level=DEFAULT_LEVEL):
+    if uf not in ESTADOS_IBGE: return None
+    return load_municipalities(uf, level) or fetch_geojson_state(uf)
+
+def get_geojson_states(level=DEFAULT_LEVEL):
+    return load_states(level) or ESTADOS_URL
+
+@traced_cache(swr_cache(ttl=3600, valid=has_data))
+def fetch_geojson_state(uf):
+    url = MUNICIPIOS_URL.format(ibge_code=ESTADOS_IBGE[uf])
     try:
         with urlopen(url) as response:
-            geojson = json.load(response)
-        for feature in geojson['features']:
-            feature['properties']['id_norm'] = normalize_text(feature['properties']['name'])
-        return geojson
+            return prepare_municipalities(json.load(response), uf)
     except Exception:
         return None
+
+# Resumo da visão padrão (período completo, todos os estados) para a primeira pintura do app.
+# Mesma chave do get_chart_tables que o app usa na visão padrão, então também deixa ela em cache.
+def refresh_summary(path=None):
+    version = get_load_version()
+    bounds = get_filter_bounds(version)
+    if bounds is None: return None
+
+    date_range = (bounds['min_date'], bounds['max_date'])
+    kpis = get_chart_tables(version, date_range, [])['kpis']
+    summary = build_summary(version, *date_range, bounds['estados'], kpis)
+    save_summary(summary, path)
+    return summary
+
+# Cargas feitas pela thread de carga inicial de cada processo do Streamlit (etl/summary.py),
+# no próprio processo que serve as sessões: primeiro o que a página inicial usa (rollups e
+# resumo), depois as consultas das outras abas. As linhas da vw_analise_vendas ficam de fora:
+# só as abas que usam carregam
+def warmup():
+    version = get_load_version()
+    rollups = [] if BACKEND == 'duckdb' else [get_sales_rollup] + ([get_orders_rollup] if EXACT_DISTINCT else [])
+
+    def timed(func, *args):
+        start = time.perf_counter()
+        func(*args)
+        timings.append((func.__name__, time.perf_counter() - start))
+
+    timings = []
+    for func in rollups + [get_filter_bounds]:
+        timed(func, version)
+    timed(refresh_summary)
+    for func in [get_payment_data, get_logistics_data, get_geo_data]:
+        timed(func, version)
+    return timings
@@ -0,0 +1,260 @@
+import os
+import sys
+import json
+import glob
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Dataset publicado uma vez por máquina como arquivo Arrow IPC versionado e aberto via mmap
+# (somente leitura) por todos os processos/réplicas do Streamlit: as páginas ficam no page
+# cache do sistema e são compartilhadas, sem uma cópia por worker.
+# Layout: <nome>-<versao>.arrow (imutável) + <nome>.current (ponteiro trocado com os.replace).
+SHARED_DIR = os.getenv('OLIST_SHARED_DIR')
+# Versões antigas mantidas no disco (processos ainda podem estar com elas abertas)
+KEEP_VERSIONS = 2
+
+META_KEY = b'olist'
+
+# Cada coluna é gravada num layout que o pandas consegue usar sem cópia: numéricos e datas como
+# buffers numpy (NaN/NaT como valores, não nulos Arrow), categorias como códigos + lista de
+# categorias nos metadados, strings pyarrow como large_string. O resto vai como Arrow nativo
+# e é convertido com cópia.
+def _encode_column(series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        meta = {'kind': 'category', 'categories': dtype.categories.tolist(), 'ordered': bool(dtype.ordered)}
+        return pa.array(series.cat.codes.to_numpy()), meta
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow':
+        return series.array._pa_array.combine_chunks().cast(pa.large_string()), {'kind': 'string', 'dtype': str(dtype)}
+    if dtype.kind == 'M' and not hasattr(dtype, 'tz'):
+        unit = np.datetime_data(dtype)[0]
+        return pa.array(series.to_numpy().view('int64')), {'kind': 'datetime', 'unit': unit}
+    if dtype.kind == 'b':
+        return pa.array(series.to_numpy().view('uint8')), {'kind': 'numpy', 'dtype': 'bool'}
+    if dtype.kind in 'iuf':
+        return pa.array(series.to_numpy(), from_pandas=False), {'kind': 'numpy', 'dtype': str(dtype)}
+    return pa.Array.from_pandas(series), {'kind': 'arrow'}
+
+def encode_frame(df):
+    arrays, columns = [], {}
+    for col in df.columns:
+        array, meta = _encode_column(df[col])
+        arrays.append(array)
+        columns[col] = meta
+    meta = {'columns': columns, 'attrs': df.attrs}
+    return pa.Table.from_arrays(arrays, names=list(df.columns), metadata={META_KEY: json.dumps(meta, default=str)})
+
+def _decode_column(column, meta):
+    if meta['kind'] == 'arrow':
+        return column.to_pandas()
+    if meta['kind'] == 'string':
+        return pd.array(column, dtype=meta['dtype'])
+
+    values = column.chunk(0).to_numpy(zero_copy_only=True) if column.num_chunks == 1 else column.to_numpy()
+    if meta['kind'] == 'category':
+        return pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(meta['categories'], meta['ordered']))
+    if meta['kind'] == 'datetime':
+        return values.view(f"datetime64[{meta['unit']}]")
+    return values.view(meta['dtype'])
+
+def decode_table(table):
+    meta = json.loads(table.schema.metadata[META_KEY])
+    data = {col: _decode_column(table.column(col), meta['columns'][col]) for col in table.column_names}
+    df = pd.DataFrame(data, copy=False)
+    df.attrs.update(meta['attrs'])
+    return df
+
+def _path(name, suffix, shared_dir=None):
+    return os.path.join(shared_dir or SHARED_DIR, f"{name}{suffix}")
+
+def _replace(path, data):
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# Ponteiro da versão atual: {'versao', 'arquivo', 'publicado_em', 'carga'}. 'carga' é a versão da
+# carga do pipeline (etl_load_version) de onde os dados saíram, vazia se desconhecida
+def current(name, shared_dir=None):
+    try:
+        with open(_path(name, '.current', shared_dir), 'rb') as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+def publish(name, df, shared_dir=None):
+    shared_dir = shared_dir or SHARED_DIR
+    os.makedirs(shared_dir, exist_ok=True)
+    version = df.attrs.get('versao') or uuid.uuid4().hex
+    file_name = f"{name}-{version}.arrow"
+    table = encode_frame(df)
+
+    # Arquivo completo (escrito e sincronizado) antes do ponteiro: quem lê o ponteiro
+    # sempre encontra uma versão inteira
+    path = os.path.join(shared_dir, file_name)
+    tmp = f"{path}.tmp"
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    with open(tmp, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    pointer = {'versao': version, 'arquivo': file_name, 'publicado_em': time.time(), 'carga': df.attrs.get('carga', '')}
+    _replace(_path(name, '.current', shared_dir), json.dumps(pointer).encode('utf-8'))
+    _cleanup(name, shared_dir)
+    return pointer
+
+def _cleanup(name, shared_dir):
+    files = sorted(glob.glob(os.path.join(shared_dir, f"{name}-*.arrow")), key=os.path.getmtime, reverse=True)
+    for path in files[KEEP_VERSIONS:]:
+        try:
+            # No Linux o mmap de quem ainda usa a versão continua válido depois do unlink
+            os.remove(path)
+        except OSError:
+            pass
+
+def open_version(name, pointer, shared_dir=None):
+    source = pa.memory_map(os.path.join(shared_dir or SHARED_DIR, pointer['arquivo']), 'r')
+    df = decode_table(pa.ipc.open_file(source).read_all())
+    df.attrs['versao'] = pointer['versao']
+    return df
+
+# Um único processo por máquina carrega e publica (flock no arquivo .lock); sem fcntl (Windows)
+# cada processo pode acabar publicando a sua versão, e a última vence
+@contextmanager
+def publish_lock(name, blocking=True, shared_dir=None):
+    if fcntl is None:
+        yield True
+        return
+
+    os.makedirs(shared_dir or SHARED_DIR, exist_ok=True)
+    with open(_path(name, '.lock', shared_dir), 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+# Publicado a partir de uma carga anterior à informada. As versões de carga são horários, então
+# comparam como texto; quem ainda conhece só uma carga antiga usa o que já foi publicado
+def _older(pointer, load_version):
+    return bool(load_version) and pointer.get('carga', '') < load_version
+
+# Dataset compartilhado com stale-while-revalidate entre processos: o ponteiro é lido a cada
+# acesso (versão nova publicada por outro worker é aberta na hora); vencido o TTL, um único
+# processo recarrega em segundo plano enquanto todos seguem lendo a versão atual. Carga nova
+# no banco (load_version) é publicada antes de servir, como no cache local por versão.
+class SharedDataset:
+    def __init__(self, name, loader, ttl=3600, shared_dir=None):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.shared_dir = shared_dir or SHARED_DIR
+        self._lock = threading.Lock()
+        self._opened = None
+        self._refreshing = False
+
+    def get(self, load_version=None):
+        pointer = current(self.name, self.shared_dir)
+        if pointer is None or _older(pointer, load_version):
+            pointer = self._publish(load_version=load_version)
+        elif time.time() - pointer['publicado_em'] > self.ttl:
+            self._refresh_in_background(load_version)
+        if pointer is None:
+            return pd.DataFrame()
+        return self._open(pointer)
+
+    def _open(self, pointer):
+        with self._lock:
+            if self._opened is None or self._opened[0] != pointer['versao']:
+                # Só a versão atual fica referenciada aqui; a anterior é liberada quando
+                # as sessões que ainda a usam terminam
+                self._opened = (pointer['versao'], open_version(self.name, pointer, self.shared_dir))
+            return self._opened[1]
+
+    def _publish(self, blocking=True, load_version=None):
+        with publish_lock(self.name, blocking, self.shared_dir) as acquired:
+            if not acquired:
+                return current(self.name, self.shared_dir)
+
+            # Outro processo pode ter publicado enquanto este esperava o lock
+            pointer = current(self.name, self.shared_dir)
+            if pointer is not None and not _older(pointer, load_version) and time.time() - pointer['publicado_em'] <= self.ttl:
+                return pointer
+
+            df = self.loader()
+            if df is None or df.empty:
+                return pointer
+            if load_version:
+                df.attrs['carga'] = load_version
+            return publish(self.name, df, self.shared_dir)
+
+    def _refresh_in_background(self, load_version=None):
+        with self._lock:
+            if self._refreshing: return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._publish(blocking=False, load_version=load_version)
+            except Exception as e:
+                # Segue servindo a versão publicada; a próxima leitura vencida tenta de novo
+                print(f"⚠️ Falha ao republicar '{self.name}': {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name=f"shared-refresh-{self.name}", daemon=True).start()
+
+def dataset_info(shared_dir=None):
+    shared_dir = shared_dir or SHARED_DIR
+    rows = []
+    for pointer_path in sorted(glob.glob(os.path.join(shared_dir, '*.current'))):
+        name = os.path.basename(pointer_path)[:-len('.current')]
+        pointer = current(name, shared_dir)
+        for path in sorted(glob.glob(os.path.join(shared_dir, f"{name}-*.arrow")), key=os.path.getmtime):
+            rows.append({
+                'dataset': name,
+                'arquivo': os.path.basename(path),
+                'mb': os.path.getsize(path) / 2 ** 20,
+                'atual': os.path.basename(path) == pointer['arquivo'],
+                'idade_min': (time.time() - os.path.getmtime(path)) / 60
+            })
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    if not SHARED_DIR:
+        print("Defina OLIST_SHARED_DIR com a pasta do dataset compartilhado")
+        sys.exit(1)
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'info'
+    if command == 'publish':
+        from .repository import load_optimized_sales_data, read_load_version
+        start = time.perf_counter()
+        load_version = read_load_version()
+        df = load_optimized_sales_data()
+        df.attrs['carga'] = load_version
+        pointer = publish('vw_analise_vendas', df, SHARED_DIR)
+        print(f"✅ {pointer['arquivo']} publicado em {time.perf_counter() - start:.1f}s")
+    elif command == 'info':
+        info = dataset_info()
+        print(info.round(1).to_string(index=False) if not info.empty else "Nenhum dataset publicado")
+    else:
+        print("Uso: python -m etl.shared [info | publish]")
+        sys.exit(1)
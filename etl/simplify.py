@@ -0,0 +1,148 @@
+from collections import defaultdict
+import numpy as np
+
+# Simplificação por arcos: as bordas são quebradas nos vértices de junção entre polígonos
+# e cada arco é simplificado uma única vez, então vizinhos continuam com a mesma fronteira
+# (sem buracos nem sobreposições)
+
+def _distances(points, start, end):
+    dx, dy = end - start
+    norm = np.hypot(dx, dy)
+    if norm == 0:
+        return np.hypot(points[:, 0] - start[0], points[:, 1] - start[1])
+    return np.abs(dx * (points[:, 1] - start[1]) - dy * (points[:, 0] - start[0])) / norm
+
+# Importância de cada vértice no Douglas-Peucker: o vértice sobrevive a qualquer tolerância
+# menor que ela. Uma única passada serve para todos os níveis de detalhe.
+def douglas_peucker_importance(points):
+    points = np.asarray(points, dtype=float)
+    importance = np.zeros(len(points))
+    importance[[0, -1]] = np.inf
+
+    stack = [(0, len(points) - 1, np.inf)]
+    while stack:
+        i, j, parent = stack.pop()
+        if j <= i + 1: continue
+        dist = _distances(points[i + 1:j], points[i], points[j])
+        k = int(np.argmax(dist))
+        value = min(dist[k], parent)
+        k += i + 1
+        importance[k] = value
+        stack.extend([(i, k, value), (k, j, value)])
+    return importance
+
+def _simplify_arc(arc, importance, tolerance, min_interior):
+    keep = importance > tolerance
+    interior = len(arc) - 2
+    required = min(min_interior, interior)
+    # Anéis pequenos não podem degenerar em linha: garante vértices internos espaçados
+    if keep[1:-1].sum() < required:
+        for i in range(required):
+            keep[1 + (i * interior) // required] = True
+    return [p for p, k in zip(arc, keep) if k]
+
+def _rings(geometry):
+    if not geometry: return []
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+def _junctions(rings):
+    neighbors = defaultdict(set)
+    for ring in rings:
+        pts = ring[:-1]
+        for i, p in enumerate(pts):
+            neighbors[p].add(pts[i - 1])
+            neighbors[p].add(pts[(i + 1) % len(pts)])
+    return {p for p, near in neighbors.items() if len(near) > 2}
+
+def _split_ring(ring, junctions):
+    pts = ring[:-1]
+    cuts = [i for i, p in enumerate(pts) if p in junctions]
+    if not cuts:
+        # Anel sem vizinhos (ilha ou enclave): o menor vértice é o ponto de partida canônico
+        cuts = [min(range(len(pts)), key=pts.__getitem__)]
+
+    start = cuts[0]
+    rotated = pts[start:] + pts[:start] + [pts[start]]
+    bounds = [c - start for c in cuts] + [len(pts)]
+    return [rotated[a:b + 1] for a, b in zip(bounds, bounds[1:])]
+
+def _canonical(arc):
+    key = tuple(arc)
+    reverse = key[::-1]
+    return (key, False) if key <= reverse else (reverse, True)
+
+def _quantize(ring, digits):
+    out = []
+    for x, y in ring:
+        p = (round(x, digits), round(y, digits))
+        if not out or out[-1] != p:
+            out.append(p)
+    return out
+
+def _quantize_polygons(polygons, digits):
+    out = []
+    for polygon in polygons:
+        rings = [_quantize(ring, digits) for ring in polygon]
+        # Anéis que colapsam no arredondamento saem; sem o anel externo, o polígono inteiro sai
+        if len(rings[0]) < 4: continue
+        out.append([ring for ring in rings if len(ring) >= 4])
+    return out
+
+def _to_geometry(geometry_type, polygons):
+    coords = [[[list(p) for p in ring] for ring in polygon] for polygon in polygons]
+    return {'type': geometry_type, 'coordinates': coords[0] if geometry_type == 'Polygon' else coords}
+
+# levels: {nome: {'tolerance': graus, 'digits': casas decimais ou None}}
+def simplify_levels(features, levels):
+    shapes = []
+    for feature in features:
+        polygons = [[[tuple(p) for p in ring] for ring in polygon] for polygon in _rings(feature['geometry'])]
+        shapes.append(polygons)
+
+    all_rings = [ring for polygons in shapes for polygon in polygons for ring in polygon if len(ring) > 3]
+    junctions = _junctions(all_rings)
+
+    split = {}
+    min_interior = defaultdict(int)
+    for ring in all_rings:
+        arcs = [_canonical(arc) for arc in _split_ring(ring, junctions)]
+        split[id(ring)] = arcs
+        # Um anel precisa de pelo menos 3 vértices distintos depois da simplificação
+        for key, _ in arcs:
+            min_interior[key] = max(min_interior[key], max(0, 3 - len(arcs)))
+
+    importance = {key: douglas_peucker_importance(key) for key in min_interior}
+
+    result = {}
+    for name, level in levels.items():
+        cache = {}
+        def assemble(ring):
+            if id(ring) not in split: return ring
+            out = []
+            for key, reverse in split[id(ring)]:
+                if key not in cache:
+                    cache[key] = _simplify_arc(key, importance[key], level['tolerance'], min_interior[key])
+                arc = cache[key][::-1] if reverse else cache[key]
+                out.extend(arc if not out else arc[1:])
+            return out
+
+        simplified = []
+        for feature, polygons in zip(features, shapes):
+            if not polygons:
+                simplified.append(feature)
+                continue
+
+            coords = [[assemble(ring) for ring in polygon] for polygon in polygons]
+            if level.get('digits') is not None:
+                # Área menor que a grade de quantização: mantém a versão apenas simplificada
+                coords = _quantize_polygons(coords, level['digits']) or coords
+            simplified.append({**feature, 'geometry': _to_geometry(feature['geometry']['type'], coords)})
+        result[name] = simplified
+    return result
+
+def count_vertices(geojson):
+    return sum(len(ring) for feature in geojson['features'] for polygon in _rings(feature['geometry']) for ring in polygon)
@@ -0,0 +1,70 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+
+# HyperLogLog das order_id por (dia, estado, categoria), gerado pelo pipeline na tabela
+# rollup_pedidos_hll (database/pipelines/rollups.py). Pedidos distintos não somam entre
+# categorias (um pedido pode ter itens de várias), mas os sketches se combinam pelo máximo
+# de cada registrador: qualquer combinação de período, estados e categorias vira um vetor
+# de REGISTERS bytes, independente de quantos pedidos existem.
+#
+# Formato esparso: uma linha (registro, rho) por registrador ocupado. O hash de 64 bits da
+# order_id usa os PRECISION bits baixos como registro; rho é a posição do primeiro bit 1
+# nos 64 - PRECISION bits restantes.
+PRECISION = 12
+REGISTERS = 2 ** PRECISION
+# Erro padrão relativo da estimativa (~1,6% com 4096 registradores)
+RELATIVE_ERROR = 1.04 / math.sqrt(REGISTERS)
+
+# OLIST_EXACT_DISTINCT=1 ignora os sketches e conta order_id distintas sobre as linhas filtradas
+EXACT_DISTINCT = os.getenv('OLIST_EXACT_DISTINCT', '').lower() in ('1', 'true', 'yes')
+
+def merge_registers(registro, rho, groups=None, n_groups=1):
+    registers = np.zeros((n_groups, REGISTERS), dtype=np.uint8)
+    rows = 0 if groups is None else groups
+    np.maximum.at(registers, (rows, np.asarray(registro, dtype=np.intp)), np.asarray(rho, dtype=np.uint8))
+    return registers
+
+# Estimador "improved raw" de Ertl (2017): sem tabelas de correção de viés e sem a troca para
+# linear counting do HyperLogLog original, que erra ~2% perto de 2,5 x REGISTERS pedidos
+def _sigma(x):
+    y, z = 1.0, x.copy()
+    while True:
+        x = x * x
+        previous, z = z, z + x * y
+        y += y
+        if np.array_equal(z, previous): return z
+
+def _tau(x):
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if np.array_equal(z, previous): return z / 3
+
+def estimate(registers):
+    q = 64 - PRECISION
+    offsets = (q + 2) * np.arange(registers.shape[0])[:, None]
+    counts = np.bincount((registers + offsets).ravel(), minlength=registers.shape[0] * (q + 2)).reshape(-1, q + 2)
+
+    # Grupo sem nenhum registrador ocupado: zero pedidos (sigma(1) diverge)
+    empty = counts[:, 0] == REGISTERS
+    zeros = np.where(empty, 0, counts[:, 0]) / REGISTERS
+    z = REGISTERS * _tau(1 - counts[:, q + 1] / REGISTERS) * 2.0 ** -q
+    z += (counts[:, 1:q + 1] * np.exp2(-np.arange(1, q + 1))).sum(axis=1)
+    z += REGISTERS * _sigma(zeros)
+    z[empty] = np.inf
+    return REGISTERS ** 2 / (2 * math.log(2)) / z
+
+# Pedidos distintos estimados no recorte de sketches (já filtrado), no total ou por coluna
+def count_distinct(sketches, by=None):
+    if by is None:
+        if sketches.empty: return 0
+        return int(np.rint(estimate(merge_registers(sketches['registro'], sketches['rho']))[0]))
+
+    codes, groups = pd.factorize(sketches[by])
+    valid = codes >= 0
+    registers = merge_registers(sketches['registro'].to_numpy()[valid], sketches['rho'].to_numpy()[valid], codes[valid], len(groups))
+    return pd.Series(np.rint(estimate(registers)).astype('int64'), index=pd.Index(groups, name=by), name='qtd_pedidos')
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+from datetime import date
+
+# Resumo pré-calculado da visão padrão (período completo, todos os estados): limites de data,
+# lista de estados e KPIs. Só usa a biblioteca padrão, então o app consegue desenhar cabeçalho,
+# filtros e cards antes de importar pandas/plotly/sqlalchemy e de carregar o dataset.
+SUMMARY_PATH = os.getenv('OLIST_SUMMARY_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'resumo.json'))
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_loader = None
+_saved_version = None
+_cold_reported = False
+
+def load_summary(path=None):
+    try:
+        with open(path or SUMMARY_PATH, encoding='utf-8') as f:
+            summary = json.load(f)
+        summary['min_date'] = date.fromisoformat(summary['min_date'])
+        summary['max_date'] = date.fromisoformat(summary['max_date'])
+        return summary
+    except (OSError, ValueError, KeyError):
+        return None
+
+def build_summary(version, min_date, max_date, states, kpis):
+    return {
+        'versao': version,
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'min_date': min_date.isoformat(),
+        'max_date': max_date.isoformat(),
+        'estados': list(states),
+        'kpis': {key: value if isinstance(value, int) else float(value) for key, value in kpis.items()}
+    }
+
+# Gravado uma vez por versão dos dados; disco somente leitura (ex.: imagem) só perde a atualização
+def save_summary(summary, path=None):
+    global _saved_version
+    if summary['versao'] == _saved_version: return False
+
+    path = path or SUMMARY_PATH
+    # Nome temporário único (como etl/shared._replace): processos gravando ao mesmo tempo não
+    # trocam o arquivo um do outro
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ Resumo não gravado em {path}: {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+        return False
+    _saved_version = summary['versao']
+    return True
+
+# Dados já carregados neste processo: os próximos reruns seguem o caminho normal
+def data_ready():
+    return _ready.is_set()
+
+def mark_ready():
+    _ready.set()
+
+# Imports pesados e carga dos dados numa thread, uma vez por processo: é o warmup do cache
+# (etl/repository.warmup), que só vale no processo que serve as sessões. O que a página inicial
+# usa vem primeiro e a sessão que pintou com o resumo espera o mesmo carregamento (single-flight
+# do etl/cache.py). OLIST_WARMUP=0 carrega só o da página inicial.
+WARMUP = os.getenv('OLIST_WARMUP', '1').lower() in ('1', 'true', 'yes')
+
+def start_background_load():
+    global _loader
+    with _lock:
+        if _loader is not None: return
+        _loader = threading.Thread(target=_background_load, name='carga-inicial', daemon=True)
+    _loader.start()
+
+def _background_load():
+    try:
+        from .repository import refresh_summary, warmup
+        if not WARMUP:
+            refresh_summary()
+            return
+
+        start = time.perf_counter()
+        timings = warmup()
+        print(f"🔥 Cache aquecido em {time.perf_counter() - start:.1f}s ({', '.join(f'{name} {elapsed * 1000:.0f} ms' for name, elapsed in timings)})")
+    except Exception as e:
+        print(f"⚠️ Carga inicial em segundo plano falhou: {e}")
+
+# Tempo até os cards de KPI saírem (primeira pintura) e até a página completa. O primeiro
+# rerun do processo (cold start) também vai para o log do servidor.
+def report_paint(source, first_paint, total):
+    global _cold_reported
+    with _lock:
+        cold = not _cold_reported
+        _cold_reported = True
+    if cold:
+        print(f"⏱️ Cold start: primeira pintura em {first_paint * 1000:.0f} ms ({source}), página completa em {total * 1000:.0f} ms")
+    return {'origem': source, 'primeira_pintura_ms': first_paint * 1000, 'pagina_ms': total * 1000, 'cold_start': cold}
+
+if __name__ == "__main__":
+    # Gera o resumo a partir do banco/snapshot (ex.: no build da imagem, antes do scale-to-zero)
+    from .repository import refresh_summary
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    summary = refresh_summary(path)
+    if summary is None:
+        print("Sem dados para gerar o resumo")
+        sys.exit(1)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"✅ Resumo salvo em {path or SUMMARY_PATH}")
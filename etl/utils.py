@@ -1,4 +1,7 @@
 import unicodedata
+from functools import lru_cache
+import numpy as np
+import pandas as pd
 
 ESTADOS_IBGE = {
     'AC': 12, 'AL': 27, 'AM': 13, 'AP': 16, 'BA': 29, 'CE': 23, 'DF': 53, 'ES': 32,
@@ -12,5 +15,19 @@ def normalize_text(text):
     return ''.join(c for c in unicodedata.normalize('NFD', text) 
                   if unicodedata.category(c) != 'Mn').lower().strip()
 
-def format_br(valor):
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
\ No newline at end of file
+# Dicionário de normalização persistente no processo, compartilhado entre
+# as cidades dos dados de vendas e os nomes dos municípios dos GeoJSONs
+@lru_cache(maxsize=65536)
+def normalize_cached(text):
+    return normalize_text(text)
+
+def normalize_series(series):
+    # Normaliza cada valor distinto uma única vez e remapeia pelos códigos categóricos
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    normalized = [normalize_cached(value) for value in uniques]
+    categories, remap = np.unique(np.array(normalized, dtype=object), return_inverse=True)
+    return pd.Series(
+        pd.Categorical.from_codes(remap[codes], categories=categories),
+        index=series.index,
+        name=series.name
+    )
\ No newline at end of file
@@ -1,13 +1,12 @@
 import plotly.express as px
-import pandas as pd
-
-def plot_financial_evolution(df):
-    evolucao_tempo = df.set_index('order_purchase_timestamp') \
-                        .resample('ME')[['valor_venda', 'valor_frete']] \
-                        .sum().reset_index()
+from etl.profiler import traced_figure
+from .figcache import cached_figure
 
+@traced_figure
+@cached_figure
+def plot_financial_evolution(mensal):
     labels_map = {
-        'order_purchase_timestamp': 'Mês de Referência',
+        'dia': 'Mês de Referência',
         'valor_venda': 'Faturamento (R$)',
         'valor_frete': 'Custo de Frete (R$)',
         'value': 'Valor (R$)',
@@ -15,8 +14,8 @@ def plot_financial_evolution(df):
     }
 
     fig = px.line(
-        evolucao_tempo,
-        x='order_purchase_timestamp',
+        mensal,
+        x='dia',
         y=['valor_venda', 'valor_frete'],
         labels=labels_map,
         markers=True,
@@ -37,6 +36,8 @@ def plot_financial_evolution(df):
     fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
     return fig
 
+@traced_figure
+@cached_figure
 def plot_payment_types(df_pagamentos):
     if df_pagamentos.empty:
         return None
@@ -49,7 +50,8 @@ def plot_payment_types(df_pagamentos):
         "pix": "Pix"
     }
 
-    df_pagamentos['payment_type'] = df_pagamentos['payment_type'].replace(traducao)
+    # Cópia: o DataFrame vem do cache compartilhado entre sessões
+    df_pagamentos = df_pagamentos.assign(payment_type=df_pagamentos['payment_type'].replace(traducao))
 
     fig = px.pie(
         df_pagamentos,
@@ -67,14 +69,10 @@ def plot_payment_types(df_pagamentos):
     )
     return fig
 
-def plot_top_states_revenue(df):
-    vendas_estado = (
-        df.groupby('estado_cliente')['valor_venda']
-        .sum()
-        .reset_index()
-        .sort_values('valor_venda', ascending=False)
-        .head(10)
-    )
+@traced_figure
+@cached_figure
+def plot_top_states_revenue(estados):
+    vendas_estado = estados.sort_values('valor_venda', ascending=False).head(10)
 
     fig = px.bar(
         vendas_estado,
@@ -95,12 +93,9 @@ def plot_top_states_revenue(df):
     fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
     return fig
 
-def plot_delivery_status(df):
-    df_copy = df.copy()
-    df_copy['status_entrega'] = df_copy['dias_atraso'].apply(lambda x: 'Atrasado' if x > 0 else 'No Prazo')
-    status_counts = df_copy['status_entrega'].value_counts().reset_index()
-    status_counts.columns = ['Status', 'Qtd']
-    
+@traced_figure
+@cached_figure
+def plot_delivery_status(status_counts):
     fig = px.pie(
         status_counts, 
         values='Qtd', 
@@ -112,68 +107,74 @@ def plot_delivery_status(df):
     )
     return fig
 
-def plot_delay_distribution(df):
-    fig = px.histogram(
-        df, 
-        x='dias_atraso', 
-        nbins=50, 
-        labels={'dias_atraso': 'Dias de Atraso (Negativo = Adiantado)'},
+# Recebe os bins já contados no servidor (aggregations.histogram_bins): a figura leva só
+# bordas e contagens, não os valores de cada pedido
+@traced_figure
+@cached_figure
+def plot_delay_distribution(bins):
+    fig = px.bar(
+        bins,
+        x='centro',
+        y='qtd',
+        labels={'centro': 'Dias de Atraso (Negativo = Adiantado)', 'qtd': 'Quantidade de Pedidos'},
         color_discrete_sequence=['#2980B9']
     )
+
+    if not bins.empty:
+        fig.update_traces(
+            width=bins['fim'].iloc[0] - bins['inicio'].iloc[0],
+            customdata=bins[['inicio', 'fim']],
+            hovertemplate="Dias de Atraso: %{customdata[0]:.1f} a %{customdata[1]:.1f}<br>Quantidade de Pedidos: %{y}<extra></extra>"
+        )
     
     fig.add_vline(x=0, line_dash="dash", line_color="#E74C3C", annotation_text="Prazo Prometido")
-    fig.update_layout(showlegend=False, yaxis_title="Quantidade de Pedidos")
+    fig.update_layout(showlegend=False, yaxis_title="Quantidade de Pedidos", bargap=0)
     return fig
 
-def plot_delay_rate_evolution(df):
-    df_copy = df.copy()
-    df_copy['flag_atraso'] = df_copy['dias_atraso'].apply(lambda x: 1 if x > 0 else 0)
-    
-    evolucao_percentual = df_copy.set_index('order_purchase_timestamp').resample('ME')['flag_atraso'].agg(['mean', 'count']).reset_index()
-    evolucao_percentual = evolucao_percentual[evolucao_percentual['count'] > 20]
-    evolucao_percentual['mean'] = evolucao_percentual['mean'] * 100
+@traced_figure
+@cached_figure
+def plot_delay_rate_evolution(mensal):
+    evolucao_percentual = mensal[mensal['qtd_itens'] > 20]
     
     fig = px.line(
         evolucao_percentual, 
-        x='order_purchase_timestamp', 
-        y='mean',
+        x='dia', 
+        y='taxa_atraso',
         markers=True,
         line_shape='spline', 
-        labels={'order_purchase_timestamp': 'Mês', 'mean': '% de Pedidos Atrasados'},
+        labels={'dia': 'Mês', 'taxa_atraso': '% de Pedidos Atrasados'},
         title="Percentual de Pedidos Fora do Prazo (Mensal)"
     )
     fig.update_traces(line_color='#2980B9')
     fig.update_yaxes(ticksuffix="%")
     return fig
 
-def plot_delay_ranking_by_state(df):
-    df_atrasados = df[df['dias_atraso'] > 0]
+@traced_figure
+@cached_figure
+def plot_delay_ranking_by_state(estados):
+    df_atrasados = estados[estados['qtd_atrasos'] > 0]
     
     if df_atrasados.empty:
         return None
         
-    ranking_atraso = df_atrasados.groupby('estado_cliente')['dias_atraso'].mean().reset_index()
-    ranking_atraso = ranking_atraso.sort_values('dias_atraso', ascending=False).head(10)
+    ranking_atraso = df_atrasados.sort_values('media_dias_atraso', ascending=False).head(10)
     
     fig = px.bar(
         ranking_atraso,
-        x='dias_atraso',
+        x='media_dias_atraso',
         y='estado_cliente',
         orientation='h',
         text_auto='.1f',
-        labels={'estado_cliente': 'Estado', 'dias_atraso': 'Média de Dias de Atraso'},
+        labels={'estado_cliente': 'Estado', 'media_dias_atraso': 'Média de Dias de Atraso'},
         color_discrete_sequence=['#2980B9']
     )
     fig.update_layout(yaxis={'categoryorder':'total ascending'})
     return fig
 
-def plot_top_categories_revenue(df):
-    prod_stats = df.groupby('product_category_name').agg({
-        'valor_venda': 'sum',
-        'order_id': 'count'
-    }).reset_index()
-    
-    top_fat = prod_stats.sort_values('valor_venda', ascending=False).head(10).copy()
+@traced_figure
+@cached_figure
+def plot_top_categories_revenue(categorias):
+    top_fat = categorias.sort_values('valor_venda', ascending=False).head(10).copy()
     
     top_fat['fat_formatado'] = top_fat['valor_venda'].apply(
         lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
@@ -204,23 +205,20 @@ def plot_top_categories_revenue(df):
     )
     return fig
 
-def plot_top_categories_volume(df):
-    prod_stats = df.groupby('product_category_name').agg({
-        'valor_venda': 'sum',
-        'order_id': 'count'
-    }).reset_index()
-
-    top_vol = prod_stats.sort_values('order_id', ascending=False).head(10).copy()
-    top_vol['vol_formatado'] = top_vol['order_id'].apply(lambda x: f"{int(x):,}".replace(",", "."))
+@traced_figure
+@cached_figure
+def plot_top_categories_volume(categorias):
+    top_vol = categorias.sort_values('qtd_itens', ascending=False).head(10).copy()
+    top_vol['vol_formatado'] = top_vol['qtd_itens'].apply(lambda x: f"{int(x):,}".replace(",", "."))
 
     fig = px.bar(
         top_vol,
-        x='order_id',
+        x='qtd_itens',
         y='product_category_name',
         orientation='h',
         text='vol_formatado',
         color_discrete_sequence=['#2980B9'],
-        labels={'product_category_name': 'Categoria', 'order_id': 'Quantidade'}
+        labels={'product_category_name': 'Categoria', 'qtd_itens': 'Quantidade'}
     )
 
     fig.update_traces(
@@ -238,17 +236,11 @@ def plot_top_categories_volume(df):
     )
     return fig
 
-def plot_freight_weight_relationship(df_log):
-    if df_log.empty: return None
+@traced_figure
+@cached_figure
+def plot_freight_weight_relationship(peso_agg):
+    if peso_agg.empty: return None
 
-    bins = [0, 500, 1000, 2000, 5000, 10000, 30000, 100000]
-    labels = ['Até 500g', '500g-1kg', '1kg-2kg', '2kg-5kg', '5kg-10kg', '10kg-30kg', '+30kg']
-    
-    df_copy = df_log.copy()
-    df_copy['faixa_peso'] = pd.cut(df_copy['product_weight_g'], bins=bins, labels=labels)
-    
-    peso_agg = df_copy.groupby('faixa_peso', observed=True)['freight_value'].mean().reset_index()
-    
     fig = px.bar(
         peso_agg, 
         x='faixa_peso', 
@@ -260,19 +252,12 @@ def plot_freight_weight_relationship(df_log):
     fig.update_yaxes(tickprefix="R$ ", tickformat=".2f")
     return fig
 
-def plot_freight_efficiency(df_log, type='expensive'):
-    if df_log.empty: return None
+@traced_figure
+@cached_figure
+def plot_freight_efficiency(cat_analysis, type='expensive'):
+    if cat_analysis.empty: return None
 
-    df_copy = df_log.copy()
-    df_copy['frete_relativo'] = (df_copy['freight_value'] / df_copy['price']) * 100
-    
-    cat_analysis = df_copy.groupby('product_category_name').agg({
-        'frete_relativo': 'mean',
-        'freight_value': 'mean',
-        'price': 'count'
-    }).reset_index()
-    
-    cat_analysis = cat_analysis[cat_analysis['price'] > 50]
+    cat_analysis = cat_analysis[cat_analysis['qtd_itens'] > 50]
     
     labels_barras = {'product_category_name': 'Categoria', 'frete_relativo': '% do Frete sobre Pedido'}
 
@@ -293,4 +278,40 @@ def plot_freight_efficiency(df_log, type='expensive'):
         labels=labels_barras
     )
     fig.update_layout(yaxis={'categoryorder': order}, xaxis_title="% do Frete sobre Pedido")
-    return fig
\ No newline at end of file
+    return fig
+
+# Frete médio (barras) e prazo médio de entrega (linha, eixo da direita) por faixa de distância
+@traced_figure
+@cached_figure
+def plot_freight_by_distance(distancias):
+    if distancias.empty: return None
+
+    fig = px.bar(
+        distancias,
+        x='faixa_distancia',
+        y='freight_value',
+        text_auto='.2f',
+        custom_data=['distancia_km', 'qtd_itens'],
+        labels={'faixa_distancia': 'Distância Vendedor → Cliente', 'freight_value': 'Frete Médio (R$)'}
+    )
+    fig.update_traces(
+        marker_color='#2980B9',
+        hovertemplate="%{x}<br>Frete Médio: R$ %{y:.2f}<br>Distância Média: %{customdata[0]:.0f} km<br>Itens: %{customdata[1]}<extra></extra>"
+    )
+    fig.add_scatter(
+        x=distancias['faixa_distancia'],
+        y=distancias['dias_entrega'],
+        name='Prazo Médio (dias)',
+        mode='lines+markers',
+        line_color='#E74C3C',
+        yaxis='y2',
+        hovertemplate="Prazo Médio: %{y:.1f} dias<extra></extra>"
+    )
+    fig.update_layout(
+        yaxis=dict(tickprefix="R$ ", tickformat=".2f"),
+        yaxis2=dict(title='Prazo Médio de Entrega (dias)', overlaying='y', side='right', showgrid=False, rangemode='tozero'),
+        legend=dict(orientation='h', y=-0.25),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig
@@ -4,4 +4,7 @@ def kpi_card(title, value):
         <div class="kpi-title">{title}</div>
         <div class="kpi-value">{value}</div>
     </div>
-    """
\ No newline at end of file
+    """
+
+def format_br(valor):
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
@@ -0,0 +1,70 @@
+import streamlit as st
+from etl.profiler import PROFILE_ENV, to_jsonl
+
+# Reruns guardados por sessão para o export
+HISTORY_SIZE = 50
+
+def profiling_requested():
+    return PROFILE_ENV or st.query_params.get('debug') == '1'
+
+# pandas e os caches só são importados com o painel aberto (fora do caminho do cold start)
+def spans_frame(trace):
+    import pandas as pd
+    spans = pd.DataFrame(trace['spans'])
+    if spans.empty: return spans
+
+    spans['nome'] = ['  ' * d + n for d, n in zip(spans['profundidade'], spans['nome'])]
+    columns = ['tipo', 'nome', 'duracao_ms', 'cache', 'linhas', 'bytes', 'json_bytes', 'serializacao_ms']
+    return spans.reindex(columns=columns).dropna(axis=1, how='all')
+
+def render_debug_panel(trace):
+    import pandas as pd
+    from etl.cache import CACHE_MEMORY_MB, cache_stats
+    from etl.database import get_pool_metrics
+    from .figcache import FIGURE_CACHE_MB, figure_cache_stats
+
+    history = st.session_state.setdefault('perfis', [])
+    history.append(trace)
+    del history[:-HISTORY_SIZE]
+
+    spans = pd.DataFrame(trace['spans'])
+    with st.sidebar:
+        st.header("🔬 Perfil do Rerun")
+        st.metric("Tempo total", f"{trace['total_ms']:.0f} ms")
+        if 'pintura' in trace:
+            st.caption(f"Primeira pintura ({trace['pintura']['origem']}): {trace['pintura']['primeira_pintura_ms']:.0f} ms")
+
+        if not spans.empty:
+            # Só o nível mais externo entra no total por tipo (spans aninhados já estão contidos nele)
+            top = spans[spans['profundidade'] == 0]
+            st.dataframe(top.groupby('tipo')['duracao_ms'].agg(['count', 'sum']).round(1), width="stretch")
+
+            if 'cache' in spans:
+                cache = spans['cache'].value_counts()
+                st.caption(f"Cache: {cache.get('hit', 0)} hits, {cache.get('miss', 0)} misses")
+
+            st.dataframe(spans_frame(trace).round(1), hide_index=True, width="stretch")
+
+        # Cache do processo (compartilhado entre sessões)
+        stats, total = cache_stats()
+        if not stats.empty:
+            st.caption(f"Cache compartilhado: {total / 2 ** 20:.1f} MB de {CACHE_MEMORY_MB} MB")
+            st.dataframe(stats.round(2), hide_index=True, width="stretch")
+
+        # Pool de conexões do processo (sem banco configurado, a seção não aparece)
+        pool = get_pool_metrics()
+        if pool:
+            st.caption(f"Pool de conexões: {pool['checked_out']} em uso, {pool['connects_per_sec']:.2f} conexões novas/s")
+            st.dataframe(pd.DataFrame([pool]).round(2), hide_index=True, width="stretch")
+
+        stats, total = figure_cache_stats()
+        if not stats.empty:
+            st.caption(f"Cache de figuras: {total / 2 ** 20:.1f} MB de {FIGURE_CACHE_MB} MB")
+            st.dataframe(stats.round(2), hide_index=True, width="stretch")
+
+        st.download_button(
+            f"⬇️ Exportar {len(history)} reruns (JSONL)",
+            to_jsonl(history),
+            file_name="olist-perfil.jsonl",
+            mime="application/jsonl"
+        )
@@ -0,0 +1,117 @@
+import os
+import json
+import hashlib
+import threading
+import functools
+from collections import OrderedDict, defaultdict
+import numpy as np
+import pandas as pd
+from etl.profiler import span
+
+# orjson (opcional) serializa ~10x mais rápido; é o mesmo que o plotly usa quando instalado
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Cache de figuras prontas, compartilhado entre sessões. A chave é (gráfico, impressão digital
+# das entradas): as tabelas de entrada já refletem filtros e versão dos dados, então voltar a
+# um filtro já visto reaproveita a figura. Figuras usadas há mais tempo saem quando o total
+# (tamanho do JSON de cada figura) passa de FIGURE_CACHE_MB; com 0 o cache fica desligado.
+FIGURE_CACHE_MB = int(os.getenv("FIGURE_CACHE_MB", 256))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_total_bytes = 0
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'evictions': 0})
+
+def _dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, default=_to_json)
+    return json.dumps(value, default=_to_json).encode('utf-8')
+
+def _to_json(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def fingerprint(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hashes = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        columns = tuple(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        return ('df', columns, _digest(hashes.tobytes()))
+    if isinstance(value, functools.partial):
+        return (fingerprint(value.func), tuple(fingerprint(a) for a in value.args), fingerprint(value.keywords))
+    if callable(value):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, (dict, list, np.ndarray)):
+        return ('json', _digest(_dumps(value)))
+    if isinstance(value, tuple):
+        return tuple(fingerprint(v) for v in value)
+    return value
+
+# Tamanho aproximado pelo JSON da figura (o que vai para o navegador)
+def figure_size(fig):
+    if fig is None: return 0
+    return len(_dumps([fig._data, fig._layout]))
+
+def _store(key, fig):
+    global _total_bytes
+    size = figure_size(fig)
+    with _lock:
+        old = _entries.pop(key, None)
+        if old:
+            _total_bytes -= old[1]
+        _entries[key] = (fig, size)
+        _total_bytes += size
+
+        budget = FIGURE_CACHE_MB * 2 ** 20
+        while _total_bytes > budget and _entries:
+            old_key, (_, old_size) = _entries.popitem(last=False)
+            _total_bytes -= old_size
+            _stats[old_key[0]]['evictions'] += 1
+
+# A figura devolvida é compartilhada: quem chama não deve alterá-la
+def cached_figure(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if FIGURE_CACHE_MB <= 0:
+            return func(*args, **kwargs)
+
+        key = (name, fingerprint(args), tuple(sorted((k, fingerprint(v)) for k, v in kwargs.items())))
+        with span('cache', name) as record:
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None:
+                    _entries.move_to_end(key)
+                    _stats[name]['hits'] += 1
+                else:
+                    _stats[name]['misses'] += 1
+            if record is not None:
+                record['cache'] = 'miss' if entry is None else 'hit'
+            if entry is not None:
+                return entry[0]
+
+            fig = func(*args, **kwargs)
+            _store(key, fig)
+            return fig
+    return wrapper
+
+def clear():
+    global _total_bytes
+    with _lock:
+        _entries.clear()
+        _total_bytes = 0
+
+def figure_cache_stats():
+    with _lock:
+        sizes = defaultdict(int)
+        for (name, *_), (_, size) in _entries.items():
+            sizes[name] += size
+        rows = [{'figura': name, 'mb': sizes[name] / 2 ** 20, **stats} for name, stats in _stats.items()]
+        return pd.DataFrame(rows), _total_bytes
@@ -1,7 +1,29 @@
 import plotly.express as px
 from .styles import CUSTOM_COLOR_SCALE
+from etl.profiler import traced_figure
+from .figcache import cached_figure
 
+# Centro e zoom do mapa de densidade (Brasil inteiro)
+BRAZIL_CENTER = {'lat': -14.5, 'lon': -52.0}
+BRAZIL_ZOOM = 2.8
+
+# Nível de detalhe da malha pelo número de áreas desenhadas: poucas áreas aguentam mais vértices
+DETAIL_BY_FEATURES = [(60, 'alto'), (300, 'medio')]
+DETAIL_FALLBACK = 'baixo'
+
+def pick_detail_level(n_features):
+    for limit, level in DETAIL_BY_FEATURES:
+        if n_features <= limit:
+            return level
+    return DETAIL_FALLBACK
+
+# geojson pode ser a malha pronta (dict/URL) ou uma função nível -> malha
+@traced_figure
+@cached_figure
 def plot_generic_choropleth(data, geojson, locations_col, feature_key, value_col, title, labels_map):
+    if callable(geojson):
+        geojson = geojson(pick_detail_level(data[locations_col].nunique()))
+
     fig = px.choropleth(
         data,
         geojson=geojson,
@@ -23,4 +45,43 @@ def plot_generic_choropleth(data, geojson, locations_col, feature_key, value_col
         coloraxis_colorbar=dict(title=labels_map.get(value_col, "Valor"))
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+# Densidade de clientes (mancha de calor) e vendedores (pontos) pelos centróides de CEP
+@traced_figure
+@cached_figure
+def plot_customer_seller_density(densidade):
+    if densidade.empty: return None
+
+    clientes = densidade[densidade['tipo'] == 'Clientes']
+    vendedores = densidade[densidade['tipo'] == 'Vendedores']
+
+    fig = px.density_map(
+        clientes,
+        lat='lat',
+        lon='lng',
+        z='qtd',
+        radius=8,
+        center=BRAZIL_CENTER,
+        zoom=BRAZIL_ZOOM,
+        map_style='carto-positron',
+        color_continuous_scale=CUSTOM_COLOR_SCALE,
+        labels={'qtd': 'Clientes'}
+    )
+    fig.add_scattermap(
+        lat=vendedores['lat'],
+        lon=vendedores['lng'],
+        mode='markers',
+        marker=dict(size=4, color='#1B2631', opacity=0.6),
+        name='Vendedores',
+        customdata=vendedores['qtd'],
+        hovertemplate="Vendedores: %{customdata}<extra></extra>"
+    )
+
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=30, b=0),
+        legend=dict(orientation='h', y=0),
+        coloraxis_colorbar=dict(title="Clientes")
+    )
+    return fig
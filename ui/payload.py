@@ -0,0 +1,86 @@
+import sys
+import time
+import pandas as pd
+
+# Tamanho e tempo de serialização do JSON que o Streamlit envia ao navegador para cada figura
+def measure_figure(fig):
+    start = time.perf_counter()
+    payload = fig.to_json()
+    return len(payload.encode('utf-8')), time.perf_counter() - start
+
+def choropleth_report(uf=None):
+    from etl.geostore import load_municipalities, load_states, DETAIL_LEVELS
+    from etl.simplify import count_vertices
+    from .maps import plot_generic_choropleth
+
+    if uf:
+        load, key, feature_key = (lambda level: load_municipalities(uf, level)), 'id_norm', 'properties.id_norm'
+    else:
+        load, key, feature_key = load_states, 'sigla', 'properties.sigla'
+
+    rows = []
+    for level in ['original'] + list(DETAIL_LEVELS):
+        geojson = load(level)
+        if not geojson: continue
+
+        data = pd.DataFrame({'area': [f['properties'][key] for f in geojson['features']]})
+        data['valor'] = range(len(data))
+        fig = plot_generic_choropleth(data, geojson, 'area', feature_key, 'valor', level, {})
+        size, elapsed = measure_figure(fig)
+        rows.append({
+            'nivel': level,
+            'areas': len(data),
+            'vertices': count_vertices(geojson),
+            'json_kb': size / 1024,
+            'serializacao_ms': elapsed * 1000
+        })
+    return pd.DataFrame(rows)
+
+# Histograma com os valores brutos (binning no navegador) x bins contados no servidor,
+# repetindo os dados para mostrar como cada payload cresce com o número de linhas
+def histogram_report(values, scales=(1, 10)):
+    import numpy as np
+    import plotly.express as px
+    from etl.aggregations import histogram_bins
+    from .charts import plot_delay_distribution
+
+    rows = []
+    for scale in scales:
+        data = pd.DataFrame({'dias_atraso': np.tile(np.asarray(values), scale)})
+
+        start = time.perf_counter()
+        raw = px.histogram(data, x='dias_atraso', nbins=50)
+        raw.add_vline(x=0, line_dash="dash", line_color="#E74C3C", annotation_text="Prazo Prometido")
+        raw_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        binned = plot_delay_distribution(histogram_bins(data['dias_atraso']))
+        binned_build = time.perf_counter() - start
+
+        for name, fig, build in [('px.histogram (valores brutos)', raw, raw_build), ('bins no servidor', binned, binned_build)]:
+            size, elapsed = measure_figure(fig)
+            rows.append({
+                'figura': name,
+                'linhas': len(data),
+                'json_kb': size / 1024,
+                'montagem_ms': build * 1000,
+                'serializacao_ms': elapsed * 1000
+            })
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'mapa'
+
+    if command == 'histograma':
+        from etl.repository import load_sales_data
+        print(histogram_report(load_sales_data()['dias_atraso']).round(1).to_string(index=False))
+    elif command == 'mapa':
+        uf = sys.argv[2].upper() if len(sys.argv) > 2 else None
+        report = choropleth_report(uf)
+        if report.empty:
+            print("Store de malhas vazio. Rode: python -m etl.geostore import <pasta>")
+        else:
+            print(report.round(1).to_string(index=False))
+    else:
+        print("Uso: python -m ui.payload [mapa [UF] | histograma]")
+        sys.exit(1)